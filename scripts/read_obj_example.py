@@ -7,7 +7,7 @@ from carbon_tool.functions import read_results_file
 
 filepath = os.path.join(carbon_tool.TEMP, 'test_building_20230328205042.obj')
 
-b = Building.from_obj(filepath)
+b = Building.from_file(filepath, lazy=True)
 
 print(b.structure.beam_embodied)
 
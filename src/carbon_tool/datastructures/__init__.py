@@ -6,4 +6,7 @@ __version__ = "0.1.0"
 
 from .building import *
 from .structure import *
-from .envelope import *
\ No newline at end of file
+from .envelope import *
+from .results import *
+from .serialization import *
+from .variants import *
\ No newline at end of file
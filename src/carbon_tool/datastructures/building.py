@@ -7,31 +7,76 @@ __version__ = "0.1.0"
 import os
 import carbon_tool
 import pickle
+
 from datetime import datetime
 
 from carbon_tool.datastructures import structure
-reload(structure)
+try:
+    reload(structure)
+except:
+    pass
 from carbon_tool.datastructures.structure import Structure
 
 from carbon_tool.datastructures import envelope
-reload(envelope)
+try:
+    reload(envelope)
+except:
+    pass
 from carbon_tool.datastructures.envelope import Envelope
 
+from carbon_tool.datastructures.results import ResultsStore
+
 from carbon_tool.functions import geometry
-reload(geometry)
+try:
+    reload(geometry)
+except:
+    pass
 
-from carbon_tool.functions.geometry import geometric_key
-from carbon_tool.functions.geometry import area_polygon
+from carbon_tool.functions.geometry import geometric_key_int
+from carbon_tool.functions.geometry import area_polygons
+from carbon_tool.functions.geometry import classify_polygons
+from carbon_tool.functions.geometry import volume_polyhedron
 from carbon_tool.functions.geometry import rhino_surface_points
 
+from carbon_tool.functions.write_results import write_operational_csv
+from carbon_tool.functions.write_results import write_results_binary
+
 try:
     import rhinoscriptsyntax as rs
 except:
     pass
 
+try:
+    import numpy as np
+except:
+    np = None
+
+
+OPERATIONAL_RESOLUTIONS = ('hourly', 'daily', 'monthly', 'annual')
+
+# number of (month, day, hour, minutes) fields that identify a period
+PERIOD_FIELDS = {'timestep': 4, 'hourly': 3, 'daily': 2, 'monthly': 1, 'annual': 0}
+
+WEATHER_FILES = {'Seattle': carbon_tool.SEATTLE,
+                 'Los Angeles': carbon_tool.LOS_ANGELES,
+                 'Milwaukee': carbon_tool.MILWAUKEE,
+                 'San Antonio': carbon_tool.SAN_ANTONIO,
+                 'New York': carbon_tool.NEW_YORK,
+                 'Atlanta': carbon_tool.ATLANTA,
+                 'Minneapolis': carbon_tool.MINNEAPOLIS,
+                 'Phoenix': carbon_tool.PHOENIX,
+                 'San Francisco': carbon_tool.SAN_FRANCISCO,
+                 'Miami': carbon_tool.MIAMI,
+                 }
+
+GLAZING_U = {'double': .4, 'triple': .2, 'single': .7}  #### Btu/h-ft2-F
+
 
 class Building(object):
 
+    # default of objects pickled before the GWP policy was added
+    gwp_policy = 'national'
+
     def __init__(self):
         self.__name__                           = 'Studio2023Building'
         self.name                               = None
@@ -56,6 +101,7 @@ class Building(object):
         self.out_path                           = None
         self.run_model                          = False
         self.city                               = None
+        self.gwp_policy                         = 'national'
         self.building_type                      = None
         self.num_floors_above                   = None
         self.composite_slab                     = None
@@ -73,6 +119,14 @@ class Building(object):
         self.balconies                          = None
         self.context_building_faces             = {}
         self.balcony_faces                      = {}
+        self._operational                       = None
+        self._quantities                        = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_operational', None)
+        state.pop('_quantities', None)
+        return state
 
     @classmethod
     def from_gh(cls,
@@ -104,16 +158,12 @@ class Building(object):
                 beams_y,
                 cores,
                 context_buildings,
-                balconies):
+                balconies,
+                gwp_policy='national'):
 
         b = cls()
 
-        if not znames or znames == ['']:
-            znames = ['zone_{}'.format(i) for i in range(len(breps))]
-        elif len(znames) != len(breps):
-            znames_ = ['zone_{}'.format(i) for i in range(len(znames), len(breps))]
-            znames.extend(znames_)
-
+        znames = _zone_names(znames, len(breps))
         b.znames = znames
 
         volume = 0
@@ -121,21 +171,6 @@ class Building(object):
             b.zone_breps[zname] = breps[i]
             volume += rs.SurfaceVolume(breps[i])[0]
 
-        weather_dict = {'Seattle': carbon_tool.SEATTLE,
-                        'Los Angeles': carbon_tool.LOS_ANGELES,
-                        'Milwaukee': carbon_tool.MILWAUKEE,
-                        'San Antonio': carbon_tool.SAN_ANTONIO,
-                        'New York': carbon_tool.NEW_YORK,
-                        'Atlanta': carbon_tool.ATLANTA,
-                        'Minneapolis': carbon_tool.MINNEAPOLIS,
-                        'Phoenix': carbon_tool.PHOENIX,
-                        'San Francisco': carbon_tool.SAN_FRANCISCO,
-                        'Miami': carbon_tool.MIAMI,
-                        }
-
-        glazing_dict = {'double': .4, 'triple': .2, 'single': .7}  #### Btu/h-ft2-F
-
-
         if not out_path:
             out_path = carbon_tool.TEMP
 
@@ -155,8 +190,9 @@ class Building(object):
         b.interior_insulation_material  = interior_insulation_material                    
         b.exterior_wall_framing         = exterior_wall_framing                
         b.interior_finish               = interior_finish                
-        b.weather_file                  = weather_dict[city]                
+        b.weather_file                  = WEATHER_FILES[city]                
         b.city                          = city
+        b.gwp_policy                    = gwp_policy
         b.out_path                      = out_path                
         b.run_model                     = run_model                
         b.building_type                 = building_type                       
@@ -166,7 +202,7 @@ class Building(object):
         b.beams_x                       = beams_x                                 
         b.beams_y                       = beams_y                                 
         b.cores                         = cores                                
-        b.glazing_u                     = glazing_dict[glazing_type]
+        b.glazing_u                     = GLAZING_U[glazing_type]
         b.results                       = None
         b.context_buildings             = context_buildings
         b.balconies                     = balconies
@@ -178,15 +214,139 @@ class Building(object):
         b.envelope = Envelope.from_geometry(b)
         return b
 
+    @classmethod
+    def from_polygons(cls,
+                      name,
+                      zone_polygons,
+                      znames,
+                      is_roof_adiabatic,
+                      is_floor_adiabatic,
+                      wwrs,
+                      shades,
+                      automated_shades,
+                      glazing_type,
+                      shgc,
+                      cladding,
+                      exterior_insulation_material,
+                      exterior_insulation_thickness,
+                      interior_insulation_material,
+                      exterior_wall_framing,
+                      interior_finish,
+                      city,
+                      out_path,
+                      run_model,
+                      building_type,
+                      num_floors_above,
+                      composite_slab,
+                      columns,
+                      beams_x,
+                      beams_y,
+                      cores,
+                      context_buildings=None,
+                      balconies=None,
+                      tolerance=0.001,
+                      gwp_policy='national'):
+
+        """ Creates a Building from plain polygons and segments, without Rhino.
+
+        Takes the same design parameters as ``from_gh``, with the zones,
+        context buildings and balconies given as polygons, so that buildings
+        can be generated and evaluated headless. The zone faces are sorted
+        with ``compute_faces`` and the volume, floor area, balcony area and
+        height are computed from the polygons. Custom shades are Rhino
+        surfaces, so there are none.
+
+        Parameters
+        ----------
+        zone_polygons : list
+            The closed faces of each zone, each face a sequence of XYZ
+            coordinates, in the order of ``znames``.
+        columns, beams_x, beams_y : list
+            The start and end points of the structural members, as from
+            ``make_grid_structure_numpy`` and ``trim_structure_numpy``.
+        cores : list
+            The core polylines.
+        context_buildings : list, optional
+            The polygons of the context building faces.
+        balconies : list, optional
+            The polygons of the balconies.
+        tolerance : float, optional
+            The size of the quantization step of the face centroid keys.
+        gwp_policy : str, optional
+            The GWP policy of the material lookups, 'national' by default.
+
+        Returns
+        -------
+        obj
+            The Building.
+
+        """
+
+        b = cls()
+
+        znames = _zone_names(znames, len(zone_polygons))
+        b.znames = znames
+
+        volume = 0
+        for polygons in zone_polygons:
+            volume += volume_polyhedron(polygons)
+
+        if not out_path:
+            out_path = carbon_tool.TEMP
+
+        b.name                          = name
+        b.volume                        = volume
+        b.is_roof_adiabatic             = is_roof_adiabatic
+        b.is_floor_adiabatic            = is_floor_adiabatic
+        b.wwrs                          = wwrs
+        b.shades                        = shades
+        b.automated_shades              = automated_shades
+        b.glazing_type                  = glazing_type
+        b.shgc                          = shgc
+        b.custom_shades                 = []
+        b.cladding                      = cladding
+        b.exterior_insulation_material  = exterior_insulation_material
+        b.exterior_insulation_thickness = exterior_insulation_thickness
+        b.interior_insulation_material  = interior_insulation_material
+        b.exterior_wall_framing         = exterior_wall_framing
+        b.interior_finish               = interior_finish
+        b.weather_file                  = WEATHER_FILES[city]
+        b.city                          = city
+        b.gwp_policy                    = gwp_policy
+        b.out_path                      = out_path
+        b.run_model                     = run_model
+        b.building_type                 = building_type
+        b.num_floors_above              = num_floors_above
+        b.composite_slab                = composite_slab
+        b.columns                       = [[[float(x) for x in p] for p in member] for member in columns]
+        b.beams_x                       = [[[float(x) for x in p] for p in member] for member in beams_x]
+        b.beams_y                       = [[[float(x) for x in p] for p in member] for member in beams_y]
+        b.cores                         = [[[float(x) for x in p] for p in core] for core in cores]
+        b.glazing_u                     = GLAZING_U[glazing_type]
+        b.results                       = None
+        b.context_buildings             = []
+        b.balconies                     = []
+
+        b.compute_faces(dict(zip(znames, zone_polygons)), tolerance)
+        for i, pts in enumerate(balconies or []):
+            b.balcony_faces[i] = [list(p) for p in pts]
+        for i, pts in enumerate(context_buildings or []):
+            b.context_building_faces[i] = [list(p) for p in pts]
+        b.compute_height()
+
+        b.structure = Structure.from_geometry(b)
+        b.envelope = Envelope.from_geometry(b)
+        return b
+
     def compute_surfaces(self):
-        
+        self.invalidate_quantities()
         cpt_dict = {}
         for zk in self.zone_breps:
             brep = self.zone_breps[zk]
             srfs = rs.ExplodePolysurfaces(brep, delete_input=False)
             for srf in srfs:
                 cpt = rs.SurfaceAreaCentroid(srf)[0]
-                gk = geometric_key(cpt)
+                gk = geometric_key_int(cpt)
                 if gk in cpt_dict:
                     cpt_dict[gk] = False
                 else:
@@ -213,7 +373,7 @@ class Building(object):
 
             for srf in srfs:
                 cpt = rs.SurfaceAreaCentroid(srf)[0]
-                gk = geometric_key(cpt)
+                gk = geometric_key_int(cpt)
                 if cpt_dict[gk]:
                     n = rs.VectorUnitize(rs.SurfaceNormal(srf, (0, 0)))
                     if rs.IsSurfaceTrimmed(srf):
@@ -258,65 +418,175 @@ class Building(object):
             pts = [pts[0], pts[1], pts[3], pts[2]]
             self.context_building_faces[i] = pts
 
+    def compute_faces(self, zone_polygons, tolerance=0.001):
+        """Fills ``zone_faces`` from the face polygons of the zones, without Rhino.
+
+        The headless equivalent of ``compute_surfaces``: the faces shared by
+        two zones are found in one hashed pass over the face centroids, and
+        the other faces are sorted into north, east, south, west, roof and
+        floor by their normals, all at once. ``zone_surfaces`` is left empty.
+
+        Parameters
+        ----------
+        zone_polygons : dict
+            The face polygons of each zone, each a sequence of XYZ
+            coordinates. The zones are read in the order of ``znames``.
+        tolerance : float, optional
+            The size of the quantization step of the centroid keys, default is ``0.001``.
+
+        """
+        self.invalidate_quantities()
+        znames = [zk for zk in self.znames if zk in zone_polygons]
+        znames += [zk for zk in zone_polygons if zk not in znames]
+        polygons = []
+        zones = []
+        for zk in znames:
+            for pts in zone_polygons[zk]:
+                polygons.append([list(p) for p in pts])
+                zones.append(zk)
+
+        for zk in znames:
+            self.zone_faces[zk]    = {'north': [],
+                                      'east': [],
+                                      'south': [],
+                                      'west': [],
+                                      'walls': [],
+                                      'roof': None,
+                                      'floor': None}
+
+        for zk, pts, orientation in zip(zones, polygons, classify_polygons(polygons, zones, tolerance)):
+            if orientation is None:
+                continue
+            if orientation in ('floor', 'roof'):
+                self.zone_faces[zk][orientation] = pts
+            else:
+                self.zone_faces[zk][orientation].append(pts)
+                self.zone_faces[zk]['walls'].append(pts)
+
     def compute_height(self):
+        self.invalidate_quantities()
+        if not self.zone_surfaces:
+            faces = self.zone_faces[list(self.zone_faces.keys())[0]]
+            faces = faces['walls'] + [faces[k] for k in ('roof', 'floor') if faces[k]]
+            z = [p[2] for pts in faces for p in pts]
+            self.height = max(z) - min(z)
+            return
         zk = list(self.zone_surfaces.keys())[0]
         roof = rhino_surface_points(self.zone_surfaces[zk]['roof'])
         floor = rhino_surface_points(self.zone_surfaces[zk]['floor'])
         self.height = roof[0][2] - floor[0][2]
 
+    @property
+    def quantities(self):
+        """The geometric quantities of the building, computed once in a single pass.
+
+        The areas of all faces are measured together, from the Rhino
+        surfaces if there are any and as one batch of polygons otherwise.
+        They are kept until ``zone_faces``, ``zone_surfaces``,
+        ``balcony_faces``, ``balconies`` or ``wwrs`` are replaced, the
+        surfaces or height are computed again, or a cheap signature of the
+        geometry changes: the window to wall ratios, the number of faces of
+        every zone, the number of balconies, the volume and the height. Other
+        in-place edits, such as moving the points of a face, must call
+        ``invalidate_quantities``.
+
+        Returns
+        -------
+        dict
+            ``'floor'`` and ``'roof'``, the area per zone; ``'walls'`` and
+            ``'windows'``, the area per orientation and zone, for the zones
+            with walls facing that way; ``'balcony'``, the total balcony
+            area; and the ``'volume'`` and ``'height'`` of the building.
+
+        """
+        objects = (self.zone_faces, self.zone_surfaces, self.balcony_faces, self.balconies, self.wwrs)
+        signature = self._quantities_signature()
+        cached = getattr(self, '_quantities', None)
+        if cached and all(a is b for a, b in zip(cached[0], objects)) and cached[1] == signature:
+            return cached[2]
+        quantities = self._compute_quantities()
+        self._quantities = objects, signature, quantities
+        return quantities
+
+    def invalidate_quantities(self):
+        """Clears the cached ``quantities``, so that they are computed again on next access.
+
+        Call it after editing the faces, surfaces or balconies of the
+        building in place.
+        """
+        self._quantities = None
+
+    def _quantities_signature(self):
+        faces = tuple((zk, len(f['north']), len(f['east']), len(f['south']), len(f['west']), f['floor'] is None,
+                       f['roof'] is None) for zk, f in self.zone_faces.items())
+        wwrs = tuple(sorted((self.wwrs or {}).items()))
+        return wwrs, faces, len(self.balcony_faces), len(self.balconies or []), self.volume, self.height
+
+    def _compute_quantities(self):
+        orientations = ['north', 'east', 'south', 'west']
+        labels = []
+        polygons = []
+        surfaces = []
+        for zk in self.zone_faces:
+            faces = self.zone_faces[zk]
+            srfs = self.zone_surfaces.get(zk)
+            for ok in orientations:
+                labels.extend((ok, zk) for _ in faces[ok])
+                polygons.extend(faces[ok])
+                if srfs:
+                    surfaces.extend(srfs[ok])
+            for ok in ('floor', 'roof'):
+                if faces[ok]:
+                    labels.append((ok, zk))
+                    polygons.append(faces[ok])
+                    if srfs:
+                        surfaces.append(srfs[ok])
+
+        if self.zone_surfaces:
+            areas = [rs.SurfaceArea(srf)[0] for srf in surfaces]
+        else:
+            areas = area_polygons(polygons)
+        if self.balconies:
+            balcony = sum(rs.SurfaceArea(bg)[0] for bg in self.balconies)
+        else:
+            balcony = sum(area_polygons(list(self.balcony_faces.values())))
+
+        quantities = {'floor': {},
+                      'roof': {},
+                      'walls': dict((ok, {}) for ok in orientations),
+                      'windows': dict((ok, {}) for ok in orientations),
+                      'balcony': balcony,
+                      'volume': self.volume,
+                      'height': self.height}
+        for (ok, zk), area in zip(labels, areas):
+            if ok in ('floor', 'roof'):
+                quantities[ok][zk] = area
+            else:
+                quantities['walls'][ok][zk] = quantities['walls'][ok].get(zk, 0) + area
+        for ok in orientations:
+            for zk, area in quantities['walls'][ok].items():
+                quantities['windows'][ok][zk] = area * self.wwrs[ok]
+        return quantities
+
     @property
     def floor_area(self):
-        fa = 0
-        for zk in self.zone_surfaces:
-            fa += rs.SurfaceArea(self.zone_surfaces[zk]['floor'])[0]
-            # pts = self.zone_faces[zk]['floor']
-            # pts.append(pts[0])
-            # pl = rs.AddPolyline(pts)
-            # # print(pl)
-            # # print(rs.IsCurve(pl))
-            # srf = rs.AddPlanarSrf(pl)
-            # if len(srf) > 1:
-            #     srf = srf[0]
-
-            # # print(srf)
-            # # print(type(srf))
-            # # print(rs.IsSurface(srf))
-            # area = rs.SurfaceArea(srf)[0]
-            # fa += area
-            # fa += area_polygon(pts)
-        # print(fa)
-        return fa
+        return sum(self.quantities['floor'].values())
 
     def zone_areas(self):
         string = ''
         tot = 0
+        floors = self.quantities['floor']
         for zk in self.znames:
-            # pts = self.zone_faces[zk]['floor']
-            # pts.append(pts[0])
-            # pl = rs.AddPolyline(pts)
-            # srf = rs.AddPlanarSrf(pl)
-            # if len(srf) > 1:
-            #     print(len(srf))
-            #     srf = srf[0]
-                
-            # area = rs.SurfaceArea(srf)[0]
-            area = rs.SurfaceArea(self.zone_surfaces[zk]['floor'])[0]
-            # area = area_polygon(pts)
+            area = floors.get(zk, 0)
             tot += area
             print(zk, area)
             string += '{:>12} = {:9.4f}\n'.format(zk, area)
         string += '{:>12} = {:9.4f}\n'.format('total', tot)
         return string
-    
+
     @property
     def balcony_area(self):
-        ba = 0
-        # for k in self.balcony_faces:
-        #     pts = self.balcony_faces[k]
-        #     ba += area_polygon(pts)
-        for bg in self.balconies:
-            ba += rs.SurfaceArea(bg)[0]
-        return ba
+        return self.quantities['balcony']
 
     def compute_structure_embodied(self):
         self.structure.compute_embodied()
@@ -395,29 +665,100 @@ class Building(object):
 
         return slabs, columns, beams, cores
 
-    def report_operational(self):
-        tot_heat = 0
-        tot_cool = 0
-        tot_light = 0
-        for key in self.results:
-            for zone in self.results[key]:
-                tot_heat += self.results[key][zone]['heating'] 
-                tot_cool += self.results[key][zone]['cooling']
-                tot_light += self.results[key][zone]['lighting']
-
-        tot_heat  /= 3.6e+6  # J to kwh
-        tot_cool  /= 3.6e+6  # J to kwh
-        tot_light /= 3.6e+6  # J to kwh
-
-        tot_heat /= 3  # COP
-        tot_cool /= 3  # COP
+    @property
+    def results_store(self):
+        """The operational results as a ``ResultsStore``.
+
+        Nested dict results of Building objects saved by older versions are
+        converted on access.
+        """
+        if isinstance(self.results, dict):
+            return ResultsStore.from_dict(self.results, self.znames)
+        return self.results
+
+    def operational_kwh(self, resolution='hourly'):
+        """Heating, cooling and lighting energy per zone, in KWh, over a time resolution.
+
+        Heating and cooling are divided by a COP of 3.
+
+        Parameters
+        ----------
+        resolution : {'timestep', 'hourly', 'daily', 'monthly', 'annual'}
+            The time resolution.
+
+        Returns
+        -------
+        list
+            The ``datetime`` of each period.
+        list
+            The zones in the results, in the order of ``znames``.
+        ndarray
+            Heating, cooling and lighting, each shaped (periods, zones), or
+            lists of rows without NumPy.
+
+        """
+        if resolution in OPERATIONAL_RESOLUTIONS:
+            return self.operational_periods()[resolution]
+        return self.operational_periods([resolution])[resolution]
+
+    def operational_periods(self, resolutions=None):
+        """Heating, cooling and lighting energy per zone, in KWh, over several time resolutions.
+
+        The results are converted to KWh once, then summed to hours, days,
+        months and the year in a single pass. The hourly, daily, monthly and
+        annual periods are kept until the results change, so that the csv
+        files and the operational report are served from the same pass.
+        Without NumPy, e.g. in IronPython, the nested dict results are summed
+        in pure Python.
+
+        Parameters
+        ----------
+        resolutions : list, optional
+            The time resolutions, hourly, daily, monthly and annual by default.
+
+        Returns
+        -------
+        dict
+            The periods, zones, heating, cooling and lighting, as returned by
+            ``operational_kwh``, per resolution.
 
+        """
+        cached = getattr(self, '_operational', None)
+        if resolutions is None:
+            if cached and cached[0] is self.results:
+                return cached[1]
+            resolutions = OPERATIONAL_RESOLUTIONS
+
+        if np is None:
+            periods = _operational_periods_dict(self.results, self.znames, resolutions)
+        else:
+            store = self.results_store
+            zones = [zone for zone in self.znames if zone in store.zone_index]
+            kwh = store.select(zones, ['heating', 'cooling', 'lighting'])
+            kwh.values /= 3.6e+6  # J to kwh
+            kwh.values[:, :, :2] /= 3  # COP
+
+            periods = {}
+            for resolution, (times, values) in kwh.aggregates(resolutions).items():
+                periods[resolution] = times, zones, values[:, :, 0], values[:, :, 1], values[:, :, 2]
+        if resolutions is OPERATIONAL_RESOLUTIONS:
+            self._operational = self.results, periods
+        return periods
+
+    def report_operational(self):
+        _, _, heat, cool, light = self.operational_kwh('annual')
+        if np is None:
+            return tuple(float(sum(sum(row) for row in values)) for values in (heat, cool, light))
+        tot_heat = float(np.nansum(heat))
+        tot_cool = float(np.nansum(cool))
+        tot_light = float(np.nansum(light))
         return tot_heat, tot_cool, tot_light
 
-    def write_csvs(self):
-        self.write_hourly_operational()
-        self.write_daily_operational()
-        self.write_monthly_operational()
+    def write_csvs(self, compress=False):
+        self.operational_periods()
+        self.write_hourly_operational(compress)
+        self.write_daily_operational(compress)
+        self.write_monthly_operational(compress)
         self.write_embodied_csv()
 
     def write_embodied_csv(self):
@@ -451,165 +792,43 @@ class Building(object):
         fh.write('{}, {},  (kg CO2e / ft2)\n'.format('total /ft2', tot_ft2))
         fh.close()
 
-    def write_monthly_operational(self):
-
-        results = {}
-        for key in self.results:
-            _, h, d, m = key.split('_')
-            # tkey = '0_0_{}_{}'.format(d, m)
-            tkey = datetime(2023, int(m), 1, 0)
-            if tkey not in results:
-                results[tkey] = {}
-            for zone in self.znames:
-                if zone not in results[tkey]:
-                    results[tkey][zone] = {'heating': 0, 'cooling':0, 'lighting': 0}
-
-                results[tkey][zone]['heating'] += self.results[key][zone]['heating']
-                results[tkey][zone]['cooling'] += self.results[key][zone]['cooling']
-                results[tkey][zone]['lighting'] += self.results[key][zone]['lighting']
-
-        fh = open(os.path.join(self.out_path, self.name, 'operational_monthly_results.csv'), 'w')
-
-
-        fh.write('time,')
-        for zone in self.znames:
-            fh.write('{0} heating (KWh),{0} cooling (KWh),{0} lighting (KWh),'.format(zone))
-        fh.write('TOTAL heating (KWh),TOTAL cooling (KWh),TOTAL lighting (KWh)\n'.format(zone))
-        # fh.write('\n')
-
-        times = sorted(list(results.keys()))
-
-        for time in times:
-            fh.write('{},'.format(time))
-            tot_heat = 0
-            tot_cool = 0
-            tot_light = 0
-            for zone in self.znames:
-                heat = results[time][zone]['heating']
-                cool = results[time][zone]['cooling']
-                light = results[time][zone]['lighting']
-                
-                heat  /= 3.6e+6  # J to kwh
-                cool  /= 3.6e+6  # J to kwh
-                light /= 3.6e+6  # J to kwh
-                heat /= 3  # COP
-                cool /= 3  # COP
-
-                tot_heat += heat
-                tot_cool += cool
-                tot_light += light
-
-                fh.write('{},{},{},'.format(heat, cool, light))
-
-            fh.write('{},{},{}\n'.format(tot_heat, tot_cool, tot_light))
-            # fh.write('\n')
-        fh.close()
+    def write_monthly_operational(self, compress=False):
+        self._write_operational('operational_monthly_results.csv', 'monthly', compress)
 
-    def write_daily_operational(self):
-
-        results = {}
-        for key in self.results:
-            _, h, d, m = key.split('_')
-            # tkey = '0_0_{}_{}'.format(d, m)
-            tkey = datetime(2023, int(m), int(d), 0)
-            if tkey not in results:
-                results[tkey] = {}
-            for zone in self.znames:
-                if zone not in results[tkey]:
-                    results[tkey][zone] = {'heating': 0, 'cooling':0, 'lighting': 0}
-
-                results[tkey][zone]['heating'] += self.results[key][zone]['heating']
-                results[tkey][zone]['cooling'] += self.results[key][zone]['cooling']
-                results[tkey][zone]['lighting'] += self.results[key][zone]['lighting']
-
-        fh = open(os.path.join(self.out_path, self.name, 'operational_daily_results.csv'), 'w')
-
-
-        fh.write('time,')
-        for zone in self.znames:
-            fh.write('{0} heating (KWh),{0} cooling (KWh),{0} lighting (KWh),'.format(zone))
-        fh.write('TOTAL heating (KWh),TOTAL cooling (KWh),TOTAL lighting (KWh)\n'.format(zone))
-        # fh.write('\n')
-
-        times = sorted(list(results.keys()))
-
-        for time in times:
-            fh.write('{},'.format(time))
-            tot_heat = 0
-            tot_cool = 0
-            tot_light = 0
-            for zone in self.znames:
-                heat = results[time][zone]['heating']
-                cool = results[time][zone]['cooling']
-                light = results[time][zone]['lighting']
-                
-                heat  /= 3.6e+6  # J to kwh
-                cool  /= 3.6e+6  # J to kwh
-                light /= 3.6e+6  # J to kwh
-                heat /= 3  # COP
-                cool /= 3  # COP
-
-                tot_heat += heat
-                tot_cool += cool
-                tot_light += light
-
-                fh.write('{},{},{},'.format(heat, cool, light))
-            fh.write('{},{},{}\n'.format(tot_heat, tot_cool, tot_light))
-            # fh.write('\n')
-        fh.close()
+    def write_daily_operational(self, compress=False):
+        self._write_operational('operational_daily_results.csv', 'daily', compress)
 
-    def write_hourly_operational(self):
-
-        fh = open(os.path.join(self.out_path, self.name, 'operational_hourly_results.csv'), 'w')
-        times = []
-        data = {}
-        for key in self.results:
-            _, h, d, m = key.split('_')
-            time = datetime(2023, int(m), int(d), int(h))
-            times.append(time)
-            data[time] = {}
-            for zone in self.znames:
-                heat = self.results[key][zone]['heating'] 
-                cool = self.results[key][zone]['cooling']
-                light = self.results[key][zone]['lighting']
-
-                heat  /= 3.6e+6  # J to kwh
-                cool  /= 3.6e+6  # J to kwh
-                light /= 3.6e+6  # J to kwh
-                heat /= 3  # COP
-                cool /= 3  # COP
-
-                data[time][zone] = {'heat': heat,
-                                    'cool': cool,
-                                    'light': light,
-                                    }
-
-        fh.write('time,')
-        for zone in self.znames:
-            fh.write('{0} heating (KWh),{0} cooling (KWh),{0} lighting (KWh),'.format(zone))
-        fh.write('TOTAL heating (KWh),TOTAL cooling (KWh),TOTAL lighting (KWh)\n'.format(zone))
-        # fh.write('\n')
-
-
-        times = sorted(times)
-        for time in times:
-            fh.write('{},'.format(time))
-            tot_heat = 0
-            tot_cool = 0
-            tot_light = 0
-            for zone in self.znames:
-                heat = data[time][zone]['heat']
-                cool = data[time][zone]['cool']
-                light = data[time][zone]['light']
-
-                tot_heat += heat
-                tot_cool += cool
-                tot_light += light
-
-                fh.write('{},{},{},'.format(heat, cool, light))
-            fh.write('{},{},{}\n'.format(tot_heat, tot_cool, tot_light))
-            # fh.write('\n')
-        fh.close()
+    def write_hourly_operational(self, compress=False):
+        self._write_operational('operational_hourly_results.csv', 'hourly', compress)
+
+    def _write_operational(self, filename, resolution, compress=False):
+        times, zones, heat, cool, light = self.operational_kwh(resolution)
+        filepath = os.path.join(self.out_path, self.name, filename)
+        write_operational_csv(filepath, times, zones, heat, cool, light, compress=compress)
+
+    def write_binary_operational(self, resolution='hourly', dtype='float64'):
+        """Writes heating, cooling and lighting per zone, in KWh, to a columnar binary file.
+
+        Parameters
+        ----------
+        resolution : {'timestep', 'hourly', 'daily', 'monthly', 'annual'}
+            The time resolution.
+        dtype : {'float64', 'float32'}
+            The type of the values.
+
+        Returns
+        -------
+        str
+            Path to the file, ``operational_<resolution>_results.ctr`` in the
+            output folder of the building.
+
+        """
+        times, zones, heat, cool, light = self.operational_kwh(resolution)
+        filepath = os.path.join(self.out_path, self.name, 'operational_{}_results.ctr'.format(resolution))
+        columns = {'heating': heat, 'cooling': cool, 'lighting': light}
+        units = {'heating': 'KWh', 'cooling': 'KWh', 'lighting': 'KWh'}
+        description = 'Operational energy of {}, heating and cooling divided by a COP of 3'.format(self.name)
+        return write_results_binary(filepath, times, zones, columns, units=units, dtype=dtype, description=description)
 
     def to_obj(self, output=True, path=None, name=None):
 
@@ -663,13 +882,113 @@ class Building(object):
 
         return building
 
+    def to_file(self, output=True, path=None, name=None):
+
+        """ Exports the Building object to a versioned .ctb file, without pickle.
+
+        Parameters
+        ----------
+        output : bool
+            Print terminal output.
+
+        Returns
+        -------
+        str
+            Path to the written file.
+
+        """
+
+        from carbon_tool.datastructures.serialization import write_building
+
+        if not path:
+            path = self.out_path
+        if not name:
+            name = self.name
+        filename = write_building(self, os.path.join(path, name + '.ctb'))
+
+        if output:
+            print('***** Building saved to: {0} *****\n'.format(filename))
+        return filename
+
+    @staticmethod
+    def from_file(filepath, output=True, lazy=False):
+
+        """ Imports a Building object from a .ctb file, or from a pickled .obj file.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to load the Building from.
+        output : bool
+            Print terminal output.
+        lazy : bool
+            Read the face polygons and operational results of a .ctb file
+            only when first accessed. Pickled files are always read whole.
+
+        Returns
+        -------
+        obj
+            Imported Building object.
+
+        """
+
+        from carbon_tool.datastructures.serialization import is_building_file
+        from carbon_tool.datastructures.serialization import read_building
+
+        if not is_building_file(filepath):
+            return Building.from_obj(filepath, output=output)
+        building = read_building(filepath, lazy=lazy)
+        if output:
+            print('***** Building loaded from: {0} *****'.format(filepath))
+        return building
+
     def surface_to_volume(self):
-        area = 0
-        for zk in self.zone_faces:
-            for wall in self.zone_faces[zk]['walls']:
-                area += area_polygon(wall)
+        walls = self.quantities['walls']
+        area = sum(walls[ok][zk] for ok in walls for zk in walls[ok])
         return area / self.volume
 
+
+def _zone_names(znames, count):
+    if not znames or znames == ['']:
+        return ['zone_{}'.format(i) for i in range(count)]
+    if len(znames) != count:
+        znames.extend(['zone_{}'.format(i) for i in range(len(znames), count)])
+    return znames
+
+
+def _operational_periods_dict(results, zones, resolutions):
+    # the pure Python equivalent of ResultsStore.aggregates over nested dict
+    # results, with missing values as zero. The Joules of each period are
+    # summed before they are converted to KWh and divided by a COP of 3
+    times = sorted((tuple(int(t) for t in key.split('_'))[::-1], key) for key in results)
+    periods = {}
+    for resolution in resolutions:
+        if resolution not in PERIOD_FIELDS:
+            raise ValueError('Unknown resolution: {}'.format(resolution))
+        n = PERIOD_FIELDS[resolution]
+        codes = []
+        rows = [], [], []
+        for time, key in times:
+            code = time[:n]
+            if not codes or code != codes[-1]:
+                codes.append(code)
+                for values in rows:
+                    values.append([0.] * len(zones))
+            for j, zone in enumerate(zones):
+                values = results[key].get(zone, {})
+                for i, variable in enumerate(('heating', 'cooling', 'lighting')):
+                    if variable in values:
+                        rows[i][-1][j] += values[variable]
+        heat, cool, light = rows
+        heat = [[value / 3.6e+6 / 3 for value in row] for row in heat]
+        cool = [[value / 3.6e+6 / 3 for value in row] for row in cool]
+        light = [[value / 3.6e+6 for value in row] for row in light]
+        start = (1, 1, 0, 0)  # month, day, hour and minutes of the start of a period
+        datetimes = [datetime(ResultsStore.year, *(code + start[n:])) for code in codes]
+        periods[resolution] = datetimes, list(zones), heat, cool, light
+    return periods
+
+
 if __name__ == '__main__':
     for i in range(50): print('')
     
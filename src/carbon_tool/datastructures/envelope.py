@@ -40,11 +40,15 @@ embodied: {}
 
 class Envelope(object):
     
+    # default of objects pickled before the GWP policy was added
+    gwp_policy = 'national'
+
     def __init__(self):
         self.orient_areas           = {'n':{}, 's':{}, 'e':{}, 'w':{}}
         self.opaque_areas           = {'n':{}, 's':{}, 'e':{}, 'w':{}}
         self.window_areas           = {'n':{}, 's':{}, 'e':{}, 'w':{}}
         self.city                   = None
+        self.gwp_policy             = 'national'
         self.external_insulation    = None
         self.insulation_thickness   = None
         self.facade_cladding        = None
@@ -68,13 +72,12 @@ class Envelope(object):
     @classmethod
     def from_geometry(cls, building):
         env = cls()
-        for zk in building.zone_surfaces:
-            for ok in ['north', 'east', 'south', 'west']:
-                if building.zone_surfaces[zk][ok]:
-                    areas = [rs.SurfaceArea(srf)[0] for srf in building.zone_surfaces[zk][ok]]
-                    env.orient_areas[ok[0]][zk] = sum(areas)
-                    env.opaque_areas[ok[0]][zk] = env.orient_areas[ok[0]][zk] * (1 - building.wwrs[ok])
-                    env.window_areas[ok[0]][zk] = env.orient_areas[ok[0]][zk] * building.wwrs[ok]
+        quantities = building.quantities
+        for ok in ['north', 'east', 'south', 'west']:
+            for zk, area in quantities['walls'][ok].items():
+                env.orient_areas[ok[0]][zk] = area
+                env.opaque_areas[ok[0]][zk] = area * (1 - building.wwrs[ok])
+                env.window_areas[ok[0]][zk] = quantities['windows'][ok][zk]
 
         interior_insulation_dict = {'2x4 Wood Studs': 4,
                                     '2x6 Wood Studs':6,
@@ -92,6 +95,7 @@ class Envelope(object):
         env.custom_shading          = building.custom_shades
         env.wwr                     = building.wwrs
         env.city                    = building.city 
+        env.gwp_policy              = building.gwp_policy
         env.int_finish              = building.interior_finish
         env.ewall_framing           = building.exterior_wall_framing
         env.interior_insul_mat      = building.interior_insulation_material
@@ -127,26 +131,27 @@ class Envelope(object):
         else:
             
             ins_thick = float(self.insulation_thickness) / 12. # currently in inches
-            ins_emb_ = float(read_materials_city(ins_mat, self.city)) / 27.  # currently (kgCO2/yd3)
+            ins_emb_ = float(read_materials_city(ins_mat, self.city, self.gwp_policy)) / 27.  # currently (kgCO2/yd3)
         ins_emb = tot_opaque * ins_thick * ins_emb_ 
 
         # facade cladding - - -
         fac_mat = self.facade_cladding
         fac_thick = float(read_materials(fac_mat)['thickness_in']) / 12. # currently (kgCO2/yd3)
-        fac_emb_ = float(read_materials_city(fac_mat, self.city)) / 27. # currently (kgCO2/yd3)
+        fac_emb_ = float(read_materials_city(fac_mat, self.city, self.gwp_policy)) / 27. # currently (kgCO2/yd3)
         fac_emb = tot_opaque * fac_thick * fac_emb_ 
 
         # interior framing - - -
         fram_mat = self.ewall_framing
         fram_thick = float(read_materials(fram_mat)['thickness_in']) / 12. # currently (kgCO2/yd3)
-        fram_emb_ = float(read_materials_city(fram_mat, self.city)) / 27. # currently (kgCO2/yd3)
+        fram_emb_ = float(read_materials_city(fram_mat, self.city, self.gwp_policy)) / 27. # currently (kgCO2/yd3)
         fram_emb = tot_opaque * fram_thick * fram_emb_ 
 
         # interior insulation - - -
         int_ins_mat = self.interior_insul_mat
         int_ins_thick = self.int_ins_thickness / 12.
         if int_ins_mat != 'None':
-            int_ins_emb_ = float(read_materials_city(int_ins_mat, self.city)) / 27. # currently (kgCO2/yd3)
+            # currently (kgCO2/yd3)
+            int_ins_emb_ = float(read_materials_city(int_ins_mat, self.city, self.gwp_policy)) / 27.
             int_ins_emb = tot_opaque * int_ins_thick * int_ins_emb_ 
         else:
             int_ins_emb = 0.
@@ -159,7 +164,7 @@ class Envelope(object):
             int_emb_ = 0
         else:
             int_thick = float(read_materials(int_mat)['thickness_in']) / 12# currently (kgCO2/yd3)
-            int_emb_ = float(read_materials_city(int_mat, self.city)) / 27 # currently (kgCO2/yd3)
+            int_emb_ = float(read_materials_city(int_mat, self.city, self.gwp_policy)) / 27 # currently (kgCO2/yd3)
         int_emb = tot_opaque * int_thick * int_emb_ 
 
         win_sys = self.glazing_system
@@ -171,7 +176,7 @@ class Envelope(object):
             glass_mat = 'Glass Triple'
         # win_emb_ = float(read_glazing(win_sys)['embodied_carbon_imperial']) # currently (KgCO2/ft2)
         glass_thick = float(read_materials(glass_mat)['thickness_in']) / 12# currently (kgCO2/yd3)
-        win_emb_ = float(read_materials_city(glass_mat, self.city)) / 27. # currently (kgCO2/yd3)
+        win_emb_ = float(read_materials_city(glass_mat, self.city, self.gwp_policy)) / 27. # currently (kgCO2/yd3)
         win_emb = tot_win * win_emb_ * glass_thick
 
         self.wall_embodied =  ins_emb + fac_emb + int_emb + fram_emb + int_ins_emb
@@ -179,7 +184,7 @@ class Envelope(object):
 
 
         # shading embodied - - - - - - -
-        alum_emb = float(read_materials_city('Aluminum', self.city)) / 27. # currently (kgCO2/yd3)
+        alum_emb = float(read_materials_city('Aluminum', self.city, self.gwp_policy)) / 27. # currently (kgCO2/yd3)
         total_shading_area = 0
 
         for srf in self.custom_shading:
@@ -0,0 +1,391 @@
+from __future__ import print_function
+
+__author__ = ["Tomas Mendez Echenagucia"]
+__copyright__ = "University of Washington 2023"
+__license__ = "MIT License"
+__email__ = "tmendeze@uw.edu"
+__version__ = "0.1.0"
+
+from array import array
+from datetime import datetime
+
+try:
+    import numpy as np
+except:
+    np = None
+
+
+__all__ = ['ResultsStore']
+
+
+TPL = """
+################################################################################
+ResultsStore: {} timesteps, {} zones, {} variables
+################################################################################
+"""
+
+
+class ResultsStore(object):
+    """Columnar store of Energy+ results.
+
+    Values are held in one float array shaped (timesteps, zones, variables),
+    sorted chronologically, with integer month, day, hour and minute arrays as
+    time index and name indexes for zones and variables. Missing values are NaN,
+    and are left out of the sums of ``aggregate``, ``aggregates`` and ``total``.
+
+    Parameters
+    ----------
+    values : array_like
+        The results, shaped (timesteps, zones, variables).
+    months, days, hours, minutes : array_like
+        The time of each timestep. Hours go from 0 to 23.
+    zones : list
+        The zone names.
+    variables : list
+        The variable names, e.g. ``'heating'``, ``'cooling'``, ``'lighting'``.
+
+    """
+
+    year = 2023
+
+    def __init__(self, values, months, days, hours, minutes, zones, variables):
+        _check_numpy()
+        self.values = np.asarray(values, dtype=float)
+        self.months = np.asarray(months, dtype=int)
+        self.days = np.asarray(days, dtype=int)
+        self.hours = np.asarray(hours, dtype=int)
+        self.minutes = np.asarray(minutes, dtype=int)
+        self.zones = list(zones)
+        self.variables = list(variables)
+        self.zone_index = {zone: i for i, zone in enumerate(self.zones)}
+        self.variable_index = {variable: i for i, variable in enumerate(self.variables)}
+        self._rows = None
+
+    def __str__(self):
+        return TPL.format(*self.values.shape)
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    @classmethod
+    def from_records(cls, records, zones, variables):
+        """Builds a store from (time, values) records, as yielded by ``iter_eso_records``.
+
+        Records with a repeated time are merged into the first one, later
+        values overwriting earlier ones.
+
+        Parameters
+        ----------
+        records : iterable
+            Tuples of (minutes, hour, day, month) and ``{zone: {variable: value}}``.
+        zones : list
+            The zone names.
+        variables : list
+            The variable names.
+
+        Returns
+        -------
+        ResultsStore
+
+        """
+        _check_numpy()
+        zone_index = {zone: i for i, zone in enumerate(zones)}
+        variable_index = {variable: i for i, variable in enumerate(variables)}
+        nz = len(zones)
+        nv = len(variables)
+        size = nz * nv
+        empty = array('d', [float('nan')]) * size
+
+        flat = array('d')
+        times = []
+        rows = {}
+        for time, values in records:
+            if time in rows:
+                start = rows[time] * size
+            else:
+                start = len(flat)
+                rows[time] = len(times)
+                times.append(time)
+                flat.extend(empty)
+            for zone in values:
+                offset = start + zone_index[zone] * nv
+                for variable, value in values[zone].items():
+                    flat[offset + variable_index[variable]] = value
+
+        values = np.array(flat, dtype=float).reshape((len(times), nz, nv))
+        minutes, hours, days, months = np.array(times, dtype=int).reshape((-1, 4)).T
+        return cls._sorted(values, months, days, hours, minutes, zones, variables)
+
+    @classmethod
+    def from_dict(cls, results, zones):
+        """Builds a store from the nested results dict of older ``Building`` objects.
+
+        Parameters
+        ----------
+        results : dict
+            ``{'minutes_hour_day_month': {zone: {variable: value}}}``
+        zones : list
+            The zone names.
+
+        Returns
+        -------
+        ResultsStore
+
+        """
+        variables = []
+        for time_key in results:
+            for zone in results[time_key]:
+                for variable in results[time_key][zone]:
+                    if variable not in variables:
+                        variables.append(variable)
+        records = ((tuple(int(t) for t in time_key.split('_')), results[time_key]) for time_key in results)
+        return cls.from_records(records, zones, variables)
+
+    @classmethod
+    def from_arrays(cls, data):
+        """Builds a store from the arrays returned by ``to_arrays``.
+
+        Parameters
+        ----------
+        data : dict
+            The arrays, or an open ``.npz`` file holding them.
+
+        Returns
+        -------
+        ResultsStore
+
+        """
+        return cls(data['values'],
+                   data['months'],
+                   data['days'],
+                   data['hours'],
+                   data['minutes'],
+                   data['zones'].tolist(),
+                   data['variables'].tolist())
+
+    def to_arrays(self):
+        """Returns the store as a dict of NumPy arrays, with zone and variable names as string arrays.
+        """
+        return {'values': self.values,
+                'months': self.months,
+                'days': self.days,
+                'hours': self.hours,
+                'minutes': self.minutes,
+                'zones': np.array(self.zones, dtype=str),
+                'variables': np.array(self.variables, dtype=str)}
+
+    def select(self, zones=None, variables=None):
+        """Returns a store with a subset of the zones and variables.
+
+        Parameters
+        ----------
+        zones : list, optional
+            The zones to keep, all by default.
+        variables : list, optional
+            The variables to keep, all by default.
+
+        Returns
+        -------
+        ResultsStore
+
+        """
+        if zones is None:
+            zones = self.zones
+        if variables is None:
+            variables = self.variables
+        values = self.values[:, [self.zone_index[zone] for zone in zones], :]
+        values = values[:, :, [self.variable_index[variable] for variable in variables]]
+        return ResultsStore(values, self.months, self.days, self.hours, self.minutes, zones, variables)
+
+    @classmethod
+    def _sorted(cls, values, months, days, hours, minutes, zones, variables):
+        order = np.lexsort((minutes, hours, days, months))
+        return cls(values[order], months[order], days[order], hours[order], minutes[order], zones, variables)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, time_key):
+        time = tuple(int(t) for t in time_key.split('_'))
+        if self._rows is None:
+            times = zip(self.minutes.tolist(), self.hours.tolist(), self.days.tolist(), self.months.tolist())
+            self._rows = {}
+            for row, key in enumerate(times):
+                self._rows.setdefault(key, row)
+        if time not in self._rows:
+            raise KeyError(time_key)
+        return self._row_dict(self._rows[time])
+
+    def _row_dict(self, row):
+        block = self.values[row]
+        data = {}
+        for zone, i in self.zone_index.items():
+            data[zone] = {}
+            for variable, j in self.variable_index.items():
+                value = block[i, j]
+                if value == value:
+                    data[zone][variable] = float(value)
+        return data
+
+    def keys(self):
+        """Returns the time keys of the store, formatted as ``'minutes_hour_day_month'``.
+        """
+        times = zip(self.minutes.tolist(), self.hours.tolist(), self.days.tolist(), self.months.tolist())
+        return ['{}_{}_{}_{}'.format(*time) for time in times]
+
+    def to_dict(self):
+        """Returns the results as the nested dict used by older ``Building`` objects.
+        """
+        return {time_key: self._row_dict(row) for row, time_key in enumerate(self.keys())}
+
+    def variable(self, name, zones=None):
+        """Returns the values of one variable.
+
+        Parameters
+        ----------
+        name : str
+            The variable name.
+        zones : list, optional
+            The zones to return, all by default.
+
+        Returns
+        -------
+        ndarray
+            The values shaped (timesteps, zones).
+
+        """
+        values = self.values[:, :, self.variable_index[name]]
+        if zones is not None:
+            values = values[:, [self.zone_index[zone] for zone in zones]]
+        return values
+
+    def datetimes(self, resolution='hourly'):
+        """Returns the datetime of every timestep or aggregation period.
+
+        Parameters
+        ----------
+        resolution : {'timestep', 'hourly', 'daily', 'monthly', 'annual'}
+            The time resolution.
+
+        Returns
+        -------
+        list
+            ``datetime`` objects.
+
+        """
+        return self._datetimes(resolution, self._period_starts(resolution))
+
+    def _datetimes(self, resolution, starts):
+        months = self.months[starts].tolist()
+        if resolution == 'annual':
+            return [datetime(self.year, 1, 1, 0) for m in months]
+        if resolution == 'monthly':
+            return [datetime(self.year, m, 1, 0) for m in months]
+        days = self.days[starts].tolist()
+        if resolution == 'daily':
+            return [datetime(self.year, m, d, 0) for m, d in zip(months, days)]
+        hours = self.hours[starts].tolist()
+        if resolution == 'hourly':
+            return [datetime(self.year, m, d, h) for m, d, h in zip(months, days, hours)]
+        minutes = self.minutes[starts].tolist()
+        return [datetime(self.year, m, d, h, mi) for m, d, h, mi in zip(months, days, hours, minutes)]
+
+    def _period_codes(self, resolution):
+        if resolution == 'timestep':
+            return np.arange(len(self))
+        elif resolution == 'hourly':
+            return (self.months * 100 + self.days) * 100 + self.hours
+        elif resolution == 'daily':
+            return self.months * 100 + self.days
+        elif resolution == 'monthly':
+            return self.months
+        elif resolution == 'annual':
+            return np.zeros(len(self), dtype=int)
+        raise ValueError('Unknown resolution: {}'.format(resolution))
+
+    def _period_starts(self, resolution):
+        if resolution == 'timestep':
+            return np.arange(len(self))
+        codes = self._period_codes(resolution)
+        if not len(codes):
+            return np.zeros(0, dtype=int)
+        return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+    def aggregate(self, resolution='hourly'):
+        """Sums the values over hours, days, months or the whole year.
+
+        Parameters
+        ----------
+        resolution : {'timestep', 'hourly', 'daily', 'monthly', 'annual'}
+            The time resolution.
+
+        Returns
+        -------
+        ndarray
+            The summed values shaped (periods, zones, variables), in the order
+            of ``datetimes(resolution)``. Missing values are skipped as in
+            ``total``, and at ``'timestep'`` the values are returned as they are.
+
+        """
+        starts = self._period_starts(resolution)
+        if resolution == 'timestep' or not len(starts):
+            return self.values.copy()
+        return np.add.reduceat(self._filled(), starts, axis=0)
+
+    def aggregates(self, resolutions=('hourly', 'daily', 'monthly', 'annual')):
+        """Sums the values over several resolutions in one pass.
+
+        The finest resolution is summed from the timesteps, and every coarser
+        one from the sums of the previous one. Missing values are skipped as
+        in ``aggregate``.
+
+        Parameters
+        ----------
+        resolutions : list
+            The time resolutions, as in ``aggregate``.
+
+        Returns
+        -------
+        dict
+            The ``datetime`` objects of the periods and the summed values
+            shaped (periods, zones, variables), per resolution.
+
+        """
+        order = ['timestep', 'hourly', 'daily', 'monthly', 'annual']
+        for resolution in resolutions:
+            if resolution not in order:
+                raise ValueError('Unknown resolution: {}'.format(resolution))
+        order = order[min(order.index(resolution) for resolution in resolutions):]
+
+        data = {}
+        rows = np.arange(len(self))
+        sums = self.values
+        for resolution in order:
+            if len(rows) and resolution != 'timestep':
+                codes = self._period_codes(resolution)[rows]
+                starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+                sums = np.add.reduceat(self._filled() if sums is self.values else sums, starts, axis=0)
+                rows = rows[starts]
+            if resolution in resolutions:
+                data[resolution] = self._datetimes(resolution, rows), sums.copy() if sums is self.values else sums
+        return data
+
+    def _filled(self):
+        missing = np.isnan(self.values)
+        if missing.any():
+            return np.where(missing, 0., self.values)
+        return self.values
+
+    def total(self, name, zones=None):
+        """Returns the sum of a variable over all timesteps and zones.
+        """
+        return float(np.nansum(self.variable(name, zones)))
+
+
+def _check_numpy():
+    if np is None:
+        raise ImportError('ResultsStore requires NumPy, results are read as nested dicts without it')
+
+
+if __name__ == "__main__":
+    pass
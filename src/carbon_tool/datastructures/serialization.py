@@ -0,0 +1,438 @@
+from __future__ import print_function
+
+__author__ = ["Tomas Mendez Echenagucia"]
+__copyright__ = "University of Washington 2023"
+__license__ = "MIT License"
+__email__ = "tmendeze@uw.edu"
+__version__ = "0.1.0"
+
+try:
+    import numpy as np
+except:
+    pass
+
+from carbon_tool.datastructures.building import Building
+from carbon_tool.datastructures.structure import Structure
+from carbon_tool.datastructures.envelope import Envelope
+from carbon_tool.datastructures.results import ResultsStore
+
+from carbon_tool.functions.container import write_container
+from carbon_tool.functions.container import read_container_header
+from carbon_tool.functions.container import read_container_array
+
+
+__all__ = ['LazyBuilding',
+           'write_building',
+           'read_building',
+           'is_building_file',
+           'encode_header',
+           'encode_sections',
+           'decode_header',
+           'read_section',
+           'set_section',
+          ]
+
+
+BUILDING_MAGIC = b'CTBLDG\x00\x00'
+BUILDING_VERSION = 2
+
+# Rhino objects, which only live in the Rhino document they were made in
+RHINO_ATTRIBUTES = ['zone_breps', 'zone_surfaces', 'context_buildings', 'balconies']
+FACE_SECTIONS = ['zone_faces', 'context_building_faces', 'balcony_faces']
+LAZY_SECTIONS = FACE_SECTIONS + ['results']
+SKIPPED_ATTRIBUTES = RHINO_ATTRIBUTES + LAZY_SECTIONS + ['_operational', '_quantities', '_lazy_sections']
+
+# lists of the building, structure and envelope kept out of the header, read with the header
+OBJECT_SECTIONS = {'members': {'building': ['columns', 'beams_x', 'beams_y', 'cores'],
+                               'structure': ['columns', 'beams_x', 'beams_y', 'main_beams', 'second_beams', 'cores']},
+                   'reports': {'structure': ['slab_strings'],
+                               'envelope': ['env_strings']}}
+SECTIONS = LAZY_SECTIONS + sorted(OBJECT_SECTIONS)
+
+
+def write_building(building, filepath):
+    """
+    Writes a building to a versioned binary file, without pickle.
+
+    The scalar inputs of the building and the attributes of its structure
+    and envelope, including the embodied results, are stored in the JSON
+    header of a container file. The face polygons and the structural members
+    are stored as vertex and vertex count arrays, and the operational
+    results as the arrays of their ``ResultsStore``. Rhino objects are not
+    stored.
+
+    Parameters
+    ----------
+    building: Building
+        The building
+    filepath: str
+        Path to the building file
+
+    Return
+    ------
+    str
+        Path to the written file
+
+    """
+    header = encode_header(building)
+    header['faces'] = {}
+    header['objects'] = {}
+    arrays = []
+    for section, (block, block_arrays) in encode_sections(building).items():
+        if section in FACE_SECTIONS:
+            header['faces'].update(block['faces'])
+        elif section in OBJECT_SECTIONS:
+            header['objects'].update(block['objects'])
+        else:
+            header.update(block)
+        arrays.extend(block_arrays)
+    return write_container(filepath, BUILDING_MAGIC, BUILDING_VERSION, header, arrays)
+
+
+def encode_header(building):
+    """
+    Encodes the scalar inputs and results of a building, its structure and
+    its envelope as a JSON-compatible dict.
+
+    The sections of ``encode_sections`` are left out.
+
+    Parameters
+    ----------
+    building: Building
+        The building
+
+    Return
+    ------
+    dict
+        The attributes of the building, structure and envelope, and the
+        names of the attributes that could not be encoded under ``'dropped'``
+
+    """
+    dropped = []
+    header = {'building': _encode_attributes(building, SKIPPED_ATTRIBUTES + _object_attributes('building'), dropped),
+              'structure': None,
+              'envelope': None}
+    for owner in ('structure', 'envelope'):
+        obj = getattr(building, owner)
+        if obj is not None:
+            header[owner] = _encode_attributes(obj, _object_attributes(owner), dropped)
+    header['dropped'] = dropped
+    return header
+
+
+def encode_sections(building):
+    """
+    Encodes the face polygons, structural members, reports and operational
+    results of a building as separate sections.
+
+    Parameters
+    ----------
+    building: Building
+        The building
+
+    Return
+    ------
+    dict
+        The header and the named arrays of each section in ``SECTIONS``,
+        which ``read_section`` reads back from a container file
+
+    """
+    sections = {}
+    for section in FACE_SECTIONS:
+        faces = getattr(building, section, None) or {}
+        vertices = []
+        counts = []
+        skeleton = _encode(faces, vertices, counts)
+        sections[section] = {'faces': {section: skeleton}}, _polygon_arrays(section, vertices, counts)
+
+    for section, owners in OBJECT_SECTIONS.items():
+        skeleton = {}
+        vertices = []
+        counts = []
+        for owner, names in owners.items():
+            obj = building if owner == 'building' else getattr(building, owner)
+            if obj is None:
+                continue
+            skeleton[owner] = {}
+            for name in names:
+                if name not in obj.__dict__:
+                    continue
+                size = len(counts), len(vertices)
+                try:
+                    skeleton[owner][name] = _encode(obj.__dict__[name], vertices, counts)
+                except TypeError:
+                    # e.g. Rhino points, which are not stored
+                    del counts[size[0]:], vertices[size[1]:]
+        sections[section] = {'objects': {section: skeleton}}, _polygon_arrays(section, vertices, counts)
+
+    if getattr(building, 'results', None) is None:
+        sections['results'] = {'results': None}, []
+    else:
+        store = building.results_store
+        sections['results'] = ({'results': {'zones': store.zones, 'variables': store.variables}},
+                               [('results/{}'.format(name), getattr(store, name))
+                                for name in ('values', 'months', 'days', 'hours', 'minutes')])
+    return sections
+
+
+def decode_header(building, header):
+    """
+    Sets the attributes encoded by ``encode_header`` on a building, and
+    creates its structure and envelope.
+
+    Parameters
+    ----------
+    building: Building
+        The new building
+    header: dict
+        The encoded header
+
+    Return
+    ------
+    Building
+
+    """
+    building.__dict__.update(_decode(header['building']))
+    if header['structure'] is not None:
+        building.structure = Structure()
+        building.structure.__dict__.update(_decode(header['structure']))
+    if header['envelope'] is not None:
+        building.envelope = Envelope()
+        building.envelope.__dict__.update(_decode(header['envelope']))
+    return building
+
+
+def set_section(building, section, value):
+    """
+    Sets a section read by ``read_section`` on a building decoded by
+    ``decode_header``.
+
+    Parameters
+    ----------
+    building: Building
+        The building
+    section: str
+        The section name, one of ``SECTIONS``
+    value: object
+        The value of the section
+
+    Return
+    ------
+    None
+
+    """
+    if section not in OBJECT_SECTIONS:
+        setattr(building, section, value)
+        return
+    for owner, attributes in (value or {}).items():
+        obj = building if owner == 'building' else getattr(building, owner)
+        if obj is not None:
+            obj.__dict__.update(attributes)
+
+
+def _object_attributes(owner):
+    return [name for owners in OBJECT_SECTIONS.values() for name in owners.get(owner, [])]
+
+
+def _polygon_arrays(section, vertices, counts):
+    return [('{}/vertices'.format(section), np.array(vertices, dtype=float).reshape((-1, 3))),
+            ('{}/counts'.format(section), np.array(counts, dtype=np.int32))]
+
+
+def read_building(filepath, lazy=False):
+    """
+    Reads a building from a file written by ``write_building``.
+
+    Attributes missing from the file, such as the Rhino objects, keep the
+    defaults of a new ``Building``.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the building file
+    lazy: bool
+        Return a ``LazyBuilding``, which reads the face polygons and
+        memory-maps the operational results on first access
+
+    Return
+    ------
+    Building
+
+    """
+    header = read_container_header(filepath, BUILDING_MAGIC, BUILDING_VERSION)
+
+    building = decode_header(LazyBuilding() if lazy else Building(), header)
+    for section in OBJECT_SECTIONS:
+        if section in header.get('objects', {}):
+            set_section(building, section, read_section(filepath, header, section))
+    sections = {section: (filepath, header) for section in LAZY_SECTIONS}
+    if lazy:
+        building.set_lazy_sections(sections)
+    else:
+        for section in LAZY_SECTIONS:
+            set_section(building, section, read_section(filepath, header, section))
+    return building
+
+
+class LazyBuilding(Building):
+    """A ``Building`` read from a ``.ctb`` file, whose face polygons and
+    operational results are only read when first accessed.
+
+    The operational results are memory-mapped, so that reading a few values
+    does not read the whole array. Saving a lazy building reads all of its
+    sections first.
+    """
+
+    def set_lazy_sections(self, sections):
+        """Sets the sections to read on first access.
+
+        Parameters
+        ----------
+        sections : dict
+            The path and header of the container file holding each section.
+
+        """
+        for section in sections:
+            self.__dict__.pop(section, None)
+        self._lazy_sections = dict(sections)
+
+    def __getattr__(self, name):
+        sections = self.__dict__.get('_lazy_sections')
+        if not sections or name not in sections:
+            raise AttributeError(name)
+        filepath, header = sections.pop(name)
+        value = read_section(filepath, header, name, mmap=True)
+        setattr(self, name, value)
+        return value
+
+    def __getstate__(self):
+        for name in list(self.__dict__.get('_lazy_sections') or {}):
+            getattr(self, name)
+        state = Building.__getstate__(self)
+        state.pop('_lazy_sections', None)
+        return state
+
+
+def read_section(filepath, header, section, mmap=False):
+    """
+    Reads a section encoded by ``encode_sections`` from a container file.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the container file
+    header: dict
+        The header of the file, from ``read_container_header``
+    section: str
+        The section name, one of ``SECTIONS``
+    mmap: bool
+        Memory-map the arrays of the operational results
+
+    Return
+    ------
+    object
+        The value of the section, as set by ``set_section``
+
+    """
+    if section == 'results':
+        if header['results'] is None:
+            return None
+        arrays = {name: read_container_array(filepath, header, 'results/{}'.format(name), mmap=mmap)
+                  for name in ('values', 'months', 'days', 'hours', 'minutes')}
+        return ResultsStore(arrays['values'],
+                            arrays['months'],
+                            arrays['days'],
+                            arrays['hours'],
+                            arrays['minutes'],
+                            header['results']['zones'],
+                            header['results']['variables'])
+
+    vertices = read_container_array(filepath, header, '{}/vertices'.format(section), mmap=False).tolist()
+    counts = read_container_array(filepath, header, '{}/counts'.format(section), mmap=False).tolist()
+    starts = [0]
+    for count in counts:
+        starts.append(starts[-1] + count)
+    polygons = [vertices[starts[i]:starts[i + 1]] for i in range(len(counts))]
+    if section in OBJECT_SECTIONS:
+        return _decode(header['objects'][section], polygons)
+    return _decode(header['faces'][section], polygons)
+
+
+def is_building_file(filepath):
+    """
+    Checks if a file was written by ``write_building``, as opposed to a
+    pickled ``.obj`` file.
+    """
+    with open(filepath, 'rb') as fh:
+        return fh.read(len(BUILDING_MAGIC)) == BUILDING_MAGIC
+
+
+def _encode_attributes(obj, skipped, dropped):
+    data = {}
+    for key, value in obj.__dict__.items():
+        if key in skipped:
+            continue
+        try:
+            data[key] = _encode(value)
+        except TypeError:
+            dropped.append('{}.{}'.format(type(obj).__name__, key))
+    return data
+
+
+def _is_polygon(value):
+    if not isinstance(value, (list, tuple)) or not value:
+        return False
+    for point in value:
+        if isinstance(point, (str, dict)):
+            return False
+        try:
+            if len([float(x) for x in point]) != 3:
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
+def _encode(value, vertices=None, counts=None):
+    # polygons are replaced by their index in counts when vertices are collected
+    if vertices is not None and _is_polygon(value):
+        vertices.extend([float(x) for x in point] for point in value)
+        counts.append(len(value))
+        return {'__polygon__': len(counts) - 1}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _encode(item, vertices, counts) for key, item in value.items()}
+        return {'__items__': [[_encode(key), _encode(item, vertices, counts)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, vertices, counts) for item in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, '__iter__'):
+        items = list(value)
+        if all(isinstance(item, (int, float)) for item in items):
+            return [float(item) for item in items]
+    raise TypeError('Cannot encode {}'.format(type(value).__name__))
+
+
+def _decode(value, polygons=None):
+    if isinstance(value, list):
+        return [_decode(item, polygons) for item in value]
+    if isinstance(value, dict):
+        if '__polygon__' in value:
+            return polygons[value['__polygon__']]
+        if '__items__' in value:
+            return {_key(_decode(key)): _decode(item, polygons) for key, item in value['__items__']}
+        return {key: _decode(item, polygons) for key, item in value.items()}
+    return value
+
+
+def _key(key):
+    if isinstance(key, list):
+        return tuple(_key(item) for item in key)
+    return key
+
+
+if __name__ == '__main__':
+    pass
@@ -16,8 +16,8 @@ from carbon_tool.functions.material_reader import read_materials_city
 
 from math import sqrt
 from carbon_tool.functions import distance_point_point
-from carbon_tool.functions import geometric_key
 from carbon_tool.functions import midpoint_point_point
+from carbon_tool.functions import unique_points
 from carbon_tool.functions import area_polygon
 
 TPL = """
@@ -28,6 +28,9 @@ Structure datastructure: {}
 
 
 class Structure(object):
+    # default of objects pickled before the GWP policy was added
+    gwp_policy = 'national'
+
     def __init__(self):
         self.conc_thick = 2. / 12. # 2 inches in feet
         self.gypsum_thick = (2 * (5. / 8.)) / 12. # based on min 80 minutes fire rating
@@ -38,6 +41,7 @@ class Structure(object):
         
         self.name               = 'carbon_tool Structure'
         self.city               = None
+        self.gwp_policy         = 'national'
         self.area               = None
         self.composite          = None
         self.btype              = None
@@ -57,6 +61,7 @@ class Structure(object):
         self.second_beams       = None 
         self.main_span          = None
         self.second_span        = None 
+        self.duplicates_dropped = None
         
     def __str__(self):
         return TPL.format(self.name)
@@ -69,6 +74,7 @@ class Structure(object):
 
         structure.name               += '{}_'.format(building.name)
         structure.city               = building.city
+        structure.gwp_policy         = building.gwp_policy
         structure.composite          = building.composite_slab
         structure.btype              = building.building_type
         structure.num_floors_above   = building.num_floors_above
@@ -96,47 +102,37 @@ class Structure(object):
         return structure
 
     def get_materials(self):
-        self.clt_kgco2_yd3 = read_materials_city('CLT', self.city)
-        self.glulam_kgco2_yd3 = read_materials_city('Glulam', self.city)
-        self.conc_kgco2_yd3 = read_materials_city('Concrete', self.city)
-        self.gyp_kgco2_yd3 = read_materials_city('GypsumX', self.city)
-        self.steel_kgco2_yd3 = read_materials_city('Steel', self.city)
-        self.rebar_kgco2_yd3 = read_materials_city('Rebar', self.city)
-
-    def add_columns_beams(self, building):
-        columns = building.columns
-        beams_x = building.beams_x
-        beams_y = building.beams_y
+        self.clt_kgco2_yd3 = read_materials_city('CLT', self.city, self.gwp_policy)
+        self.glulam_kgco2_yd3 = read_materials_city('Glulam', self.city, self.gwp_policy)
+        self.conc_kgco2_yd3 = read_materials_city('Concrete', self.city, self.gwp_policy)
+        self.gyp_kgco2_yd3 = read_materials_city('GypsumX', self.city, self.gwp_policy)
+        self.steel_kgco2_yd3 = read_materials_city('Steel', self.city, self.gwp_policy)
+        self.rebar_kgco2_yd3 = read_materials_city('Rebar', self.city, self.gwp_policy)
+
+    def add_columns_beams(self, building, tolerance=0.001):
+        """Adds the columns, beams and cores of a building, dropping the
+        members whose midpoint is within a tolerance of an earlier member of
+        the same kind, as the grids of adjacent floors share members.
+
+        Parameters
+        ----------
+        building : Building
+            The building.
+        tolerance : float, optional
+            The distance under which two midpoints are the same, default is ``0.001``.
+
+        Returns
+        -------
+        dict
+            The number of dropped columns, x beams and y beams.
+
+        """
+        cols, n_cols = _unique_members(building.columns, tolerance)
+        bx, n_bx = _unique_members(building.beams_x, tolerance)
+        by, n_by = _unique_members(building.beams_y, tolerance)
         cores    = building.cores
 
-        cmap = []
-        cols = []
-        for col in columns:
-            mpt = midpoint_point_point(col[0], col[1])
-            gk = geometric_key(mpt)
-            if gk not in cmap:
-                cols.append(col)
-                cmap.append(gk)
-
-        cmap = []
-        bx = []
-        for b in beams_x:
-            mpt = midpoint_point_point(b[0], b[1])
-            gk = geometric_key(mpt)
-            if gk not in cmap:
-                bx.append(b)
-                cmap.append(gk)
-
-        cmap = []
-        by = []
-        for b in beams_y:
-            mpt = midpoint_point_point(b[0], b[1])
-            gk = geometric_key(mpt)
-            if gk not in cmap:
-                by.append(b)
-                cmap.append(gk)
-
-        columns = [[list(a), list(b)] for a, b in columns]
+        columns = [[list(a), list(b)] for a, b in cols]
         bx = [[list(a), list(b)] for a, b in bx]
         by = [[list(a), list(b)] for a, b in by]
 
@@ -159,7 +155,10 @@ class Structure(object):
         for a, b in by:
             d = distance_point_point(a, b)
             if d > self.span_y:
-                self.span_y = d  
+                self.span_y = d
+
+        self.duplicates_dropped = {'columns': n_cols, 'beams_x': n_bx, 'beams_y': n_by}
+        return self.duplicates_dropped
 
     def compute_embodied(self):
         self.get_materials()
@@ -313,5 +312,13 @@ class Structure(object):
         vol = tdist * self.height * 0.037037
         self.core_embodied = (vol * self.conc_kgco2_yd3) + (vol * .04 * self.rebar_kgco2_yd3)
 
+
+def _unique_members(members, tolerance):
+    members = list(members)
+    midpoints = [midpoint_point_point(a, b) for a, b in members]
+    unique = unique_points(midpoints, tolerance)
+    return [members[i] for i in unique], len(members) - len(unique)
+
+
 if __name__ == "__main__":
     pass
@@ -0,0 +1,210 @@
+from __future__ import print_function
+
+__author__ = ["Tomas Mendez Echenagucia"]
+__copyright__ = "University of Washington 2023"
+__license__ = "MIT License"
+__email__ = "tmendeze@uw.edu"
+__version__ = "0.1.0"
+
+import os
+import json
+import hashlib
+
+from carbon_tool.datastructures.building import Building
+from carbon_tool.datastructures.serialization import LazyBuilding
+from carbon_tool.datastructures.serialization import LAZY_SECTIONS
+from carbon_tool.datastructures.serialization import encode_header
+from carbon_tool.datastructures.serialization import encode_sections
+from carbon_tool.datastructures.serialization import decode_header
+from carbon_tool.datastructures.serialization import read_section
+from carbon_tool.datastructures.serialization import set_section
+
+from carbon_tool.functions.container import write_container
+from carbon_tool.functions.container import read_container_header
+
+
+__all__ = ['VariantStore']
+
+
+BLOCK_MAGIC = b'CTBLOCK\x00'
+BLOCK_VERSION = 1
+MANIFEST_VERSION = 2
+
+TPL = """
+################################################################################
+VariantStore: {}
+{} variants, {} blocks
+################################################################################
+"""
+
+
+class VariantStore(object):
+    """Content-addressed store of the building variants of a project.
+
+    The face polygons, structural members, reports and operational results
+    of every saved building are split into blocks, one per section, which
+    are stored once under the SHA-1 hash of their content in ``blocks/``. A
+    variant is a small JSON manifest in ``variants/`` that holds the scalar
+    inputs and embodied results of the building and the hashes of its
+    blocks, so variants that share their geometry share its blocks on disk.
+
+    Parameters
+    ----------
+    path : str
+        The folder of the store, created if it does not exist.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        for folder in ('blocks', 'variants'):
+            if not os.path.isdir(os.path.join(path, folder)):
+                os.makedirs(os.path.join(path, folder))
+
+    def __str__(self):
+        return TPL.format(self.path, len(self.variants()), len(self.blocks()))
+
+    def __contains__(self, name):
+        return os.path.exists(self._manifest_path(name))
+
+    def variants(self):
+        """Returns the names of the saved variants.
+        """
+        names = [name[:-5] for name in os.listdir(os.path.join(self.path, 'variants')) if name.endswith('.json')]
+        return sorted(names)
+
+    def blocks(self):
+        """Returns the hashes of the stored blocks.
+        """
+        hashes = []
+        root = os.path.join(self.path, 'blocks')
+        for folder in sorted(os.listdir(root)):
+            hashes.extend(name[:-4] for name in sorted(os.listdir(os.path.join(root, folder))) if name.endswith('.blk'))
+        return hashes
+
+    def save(self, building, name=None):
+        """Saves a building as a variant, writing only the blocks not stored yet.
+
+        Parameters
+        ----------
+        building : Building
+            The building.
+        name : str, optional
+            The name of the variant, the name of the building by default.
+
+        Returns
+        -------
+        dict
+            The hash of the block of each section.
+
+        """
+        if not name:
+            name = building.name
+        manifest = encode_header(building)
+        manifest['version'] = MANIFEST_VERSION
+        manifest['blocks'] = {}
+        for section, (header, arrays) in encode_sections(building).items():
+            sha1 = _block_hash(header, arrays)
+            path = self._block_path(sha1)
+            if not os.path.exists(path):
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                write_container(path, BLOCK_MAGIC, BLOCK_VERSION, header, arrays)
+            manifest['blocks'][section] = sha1
+
+        path = self._manifest_path(name)
+        temp = path + '.tmp'
+        with open(temp, 'w') as fh:
+            json.dump(manifest, fh, sort_keys=True)
+        os.replace(temp, path)
+        return manifest['blocks']
+
+    def load(self, name, lazy=False):
+        """Loads a variant.
+
+        Parameters
+        ----------
+        name : str
+            The name of the variant.
+        lazy : bool
+            Return a ``LazyBuilding``, whose blocks are read on first access.
+
+        Returns
+        -------
+        Building
+
+        """
+        with open(self._manifest_path(name), 'r') as fh:
+            manifest = json.load(fh)
+        if manifest['version'] > MANIFEST_VERSION:
+            raise ValueError('Unsupported variant version {}: {}'.format(manifest['version'], name))
+
+        building = decode_header(LazyBuilding() if lazy else Building(), manifest)
+        sections = {}
+        for section in manifest['blocks']:
+            path = self._block_path(manifest['blocks'][section])
+            sections[section] = path, read_container_header(path, BLOCK_MAGIC, BLOCK_VERSION)
+        for section in list(sections):
+            if section not in LAZY_SECTIONS:
+                path, header = sections.pop(section)
+                set_section(building, section, read_section(path, header, section))
+        if lazy:
+            building.set_lazy_sections(sections)
+        else:
+            for section, (path, header) in sections.items():
+                set_section(building, section, read_section(path, header, section))
+        return building
+
+    def remove(self, name, prune=True):
+        """Removes a variant.
+
+        Parameters
+        ----------
+        name : str
+            The name of the variant.
+        prune : bool
+            Also remove the blocks no other variant points at.
+
+        """
+        os.remove(self._manifest_path(name))
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Removes the blocks no variant points at.
+
+        Returns
+        -------
+        int
+            The number of removed blocks.
+
+        """
+        used = set()
+        for name in self.variants():
+            with open(self._manifest_path(name), 'r') as fh:
+                used.update(json.load(fh)['blocks'].values())
+        removed = 0
+        for sha1 in self.blocks():
+            if sha1 not in used:
+                os.remove(self._block_path(sha1))
+                removed += 1
+        return removed
+
+    def _manifest_path(self, name):
+        return os.path.join(self.path, 'variants', '{}.json'.format(name))
+
+    def _block_path(self, sha1):
+        return os.path.join(self.path, 'blocks', sha1[:2], '{}.blk'.format(sha1))
+
+
+def _block_hash(header, arrays):
+    sha = hashlib.sha1()
+    sha.update(json.dumps(header, sort_keys=True).encode('utf-8'))
+    for name, array in arrays:
+        sha.update('{}:{}:{}'.format(name, array.dtype.str, array.shape).encode('utf-8'))
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+if __name__ == '__main__':
+    pass
@@ -7,4 +7,7 @@ __version__ = "0.1.0"
 from .make_structure import *
 from .geometry import *
 from .material_reader import *
-from .read_results import *
\ No newline at end of file
+from .container import *
+from .read_results import *
+from .write_results import *
+from .portfolio import *
\ No newline at end of file
@@ -0,0 +1,156 @@
+from __future__ import print_function
+
+__author__ = ["Tomas Mendez Echenagucia"]
+__copyright__ = "Tomas Mendez Echenagucia - University of Washington"
+__license__ = "MIT License"
+__email__ = "tmendeze@uw.edu"
+__version__ = "0.1.0"
+
+import os
+import json
+import struct
+
+try:
+    import numpy as np
+except:
+    pass
+
+
+__all__ = ['write_container',
+           'read_container_header',
+           'read_container_array',
+          ]
+
+
+CONTAINER_HEADER = struct.Struct('<8sIIQ')
+CONTAINER_ALIGN = 64
+
+
+def write_container(filepath, magic, version, header, arrays):
+    """
+    Writes a JSON header and NumPy arrays to a binary container file.
+
+    The file starts with an 8 byte magic, the format version, the length of
+    the utf-8 JSON header and the offset of the data section. The header
+    gives the dtype, shape and offset in the data section of every array
+    under ``'arrays'``. Every array starts on a 64 byte boundary, so any of
+    them can be memory-mapped on its own.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the container file
+    magic: bytes
+        The 8 byte magic of the file type
+    version: int
+        The version of the file type
+    header: dict
+        JSON serializable data stored in the header
+    arrays: list
+        Tuples of the name and values of each array
+
+    Return
+    ------
+    str
+        Path to the written file
+
+    """
+    arrays = [(name, np.ascontiguousarray(array)) for name, array in arrays]
+    entries = []
+    position = 0
+    for name, array in arrays:
+        dtype = array.dtype.newbyteorder('<') if array.dtype.byteorder == '>' else array.dtype
+        entries.append({'name': name, 'dtype': dtype.str, 'shape': list(array.shape), 'offset': position})
+        position = _aligned(position + array.nbytes)
+
+    header = dict(header)
+    header['arrays'] = entries
+    header = json.dumps(header, sort_keys=True).encode('utf-8')
+    data_start = _aligned(CONTAINER_HEADER.size + len(header))
+
+    temp = filepath + '.tmp'
+    with open(temp, 'wb') as fh:
+        fh.write(CONTAINER_HEADER.pack(magic, version, len(header), data_start))
+        fh.write(header)
+        for (_, array), entry in zip(arrays, entries):
+            fh.write(b'\x00' * (data_start + entry['offset'] - fh.tell()))
+            fh.write(array.astype(entry['dtype'], copy=False).tobytes())
+    os.replace(temp, filepath)
+    return filepath
+
+
+def read_container_header(filepath, magic, version):
+    """
+    Reads the header of a binary container file.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the container file
+    magic: bytes
+        The expected 8 byte magic
+    version: int
+        The highest supported version
+
+    Return
+    ------
+    dict
+        The header, with the dtype, shape and absolute offset of every array
+        by name under ``'arrays'`` and the file version under ``'version'``
+
+    """
+    with open(filepath, 'rb') as fh:
+        prefix = fh.read(CONTAINER_HEADER.size)
+        if len(prefix) < CONTAINER_HEADER.size or prefix[:8] != magic:
+            raise ValueError('Not a {} file: {}'.format(magic.rstrip(b'\x00').decode('ascii'), filepath))
+        _, file_version, length, data_start = CONTAINER_HEADER.unpack(prefix)
+        if file_version > version:
+            raise ValueError('Unsupported file version {}: {}'.format(file_version, filepath))
+        header = json.loads(fh.read(length).decode('utf-8'))
+    header['version'] = file_version
+    header['arrays'] = {entry['name']: (entry['dtype'], tuple(entry['shape']), data_start + entry['offset'])
+                        for entry in header['arrays']}
+    return header
+
+
+def read_container_array(filepath, header, name, mmap=True):
+    """
+    Reads one array of a binary container file, without reading the others.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the container file
+    header: dict
+        The header from ``read_container_header``
+    name: str
+        The name of the array
+    mmap: bool
+        Memory-map the array read-only instead of reading it into memory
+
+    Return
+    ------
+    ndarray
+
+    """
+    if name not in header['arrays']:
+        raise KeyError(name)
+    dtype, shape, offset = header['arrays'][name]
+    count = 1
+    for size in shape:
+        count *= size
+    if not count:
+        return np.zeros(shape, dtype=dtype)
+    if mmap:
+        return np.memmap(filepath, dtype=dtype, mode='r', offset=offset, shape=shape)
+    with open(filepath, 'rb') as fh:
+        fh.seek(offset)
+        return np.fromfile(fh, dtype=dtype, count=count).reshape(shape)
+
+
+def _aligned(position):
+    return position + (-position % CONTAINER_ALIGN)
+
+
+if __name__ == '__main__':
+    pass
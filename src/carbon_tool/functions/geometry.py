@@ -1,8 +1,16 @@
 from __future__ import print_function
 
+from math import acos
 from math import fabs
+from math import floor
+from math import pi
 from math import sqrt
 
+try:
+    import numpy as np
+except:
+    np = None
+
 __author__ = ["Tomas Mendez Echenagucia"]
 __copyright__ = "University of Washington 2023"
 __license__ = "MIT License"
@@ -42,6 +50,66 @@ def geometric_key(xyz, precision=None, sanitize=True):
     return '{0:.{3}},{1:.{3}},{2:.{3}}'.format(x, y, z, precision)
 
 
+def geometric_key_int(xyz, tolerance=0.001):
+    """Compute an integer key of a point, quantized at a tolerance.
+
+    The faster equivalent of ``geometric_key``: the key of a point is its
+    coordinates divided by the tolerance and rounded to integers. Integers
+    have no negative zero, so, as with ``sanitize``, coordinates that round
+    to -0.0 get the same key as 0.0.
+
+    Parameters
+    ----------
+    xyz : sequence of float
+        XYZ coordinates of the point.
+    tolerance : float, optional
+        The size of the quantization step, default is ``0.001``, as the
+        default ``'3f'`` precision of ``geometric_key``.
+
+    Returns
+    -------
+    tuple
+        Three integers.
+
+    Examples
+    --------
+    >>> geometric_key_int([1.0, -0.0001, 2.5])
+    (1000, 0, 2500)
+
+    """
+    return (int(round(xyz[0] / tolerance)),
+            int(round(xyz[1] / tolerance)),
+            int(round(xyz[2] / tolerance)))
+
+
+def geometric_keys_numpy(points, tolerance=0.001):
+    """Compute the integer keys of many points at once.
+
+    The batch equivalent of ``geometric_key_int``.
+
+    Parameters
+    ----------
+    points : array_like
+        XYZ coordinates of the points, shaped (n, 3).
+    tolerance : float, optional
+        The size of the quantization step, default is ``0.001``.
+
+    Returns
+    -------
+    ndarray
+        The keys as int64, shaped (n, 3). ``map(tuple, keys.tolist())``
+        gives the keys of ``geometric_key_int``.
+
+    Examples
+    --------
+    >>> geometric_keys_numpy([[1.0, -0.0001, 2.5], [0.0, 0.0, 0.0]]).tolist()
+    [[1000, 0, 2500], [0, 0, 0]]
+
+    """
+    points = np.asarray(points, dtype=float).reshape((-1, 3))
+    return np.rint(points / tolerance).astype(np.int64)
+
+
 def distance_point_point(a, b):
     """Compute the distance bewteen a and b.
 
@@ -491,4 +559,592 @@ def normal_polygon(polygon, unitized=True):
     if not unitized:
         return nx, ny, nz
 
-    return normalize_vector([nx, ny, nz])
\ No newline at end of file
+    return normalize_vector([nx, ny, nz])
+
+
+def flatten_polygons(polygons):
+    """Pack polygons with any number of vertices into a ragged array layout.
+
+    Parameters
+    ----------
+    polygons : list
+        The polygons, each a sequence of XYZ coordinates.
+
+    Returns
+    -------
+    vertices : ndarray
+        The vertices of all polygons, one after the other, shaped (n, 3).
+    counts : ndarray
+        The number of vertices of each polygon.
+
+    Examples
+    --------
+    >>> vertices, counts = flatten_polygons([[[0, 0, 0], [1, 0, 0], [0, 1, 0]]])
+    >>> vertices.shape, counts.tolist()
+    ((3, 3), [3])
+
+    """
+    counts = np.array([len(polygon) for polygon in polygons], dtype=int)
+    vertices = np.array([point[:3] if isinstance(point, (list, tuple)) else [point[0], point[1], point[2]]
+                         for polygon in polygons for point in polygon], dtype=float).reshape((-1, 3))
+    return vertices, counts
+
+
+def centroid_polygons_numpy(vertices, counts):
+    """Compute the centroids of the vertices of many polygons at once.
+
+    The batch equivalent of ``centroid_points`` applied to every polygon.
+
+    Parameters
+    ----------
+    vertices : array_like
+        The vertices of all polygons, shaped (n, 3), as from ``flatten_polygons``.
+    counts : array_like
+        The number of vertices of each polygon.
+
+    Returns
+    -------
+    ndarray
+        XYZ coordinates of the centroids, shaped (polygons, 3).
+
+    Examples
+    --------
+    >>> centroid_polygons_numpy([[0, 0, 0], [2, 0, 0], [2, 2, 0], [0, 2, 0]], [4]).tolist()
+    [[1.0, 1.0, 0.0]]
+
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    counts = np.asarray(counts, dtype=int)
+    if not len(counts):
+        return np.zeros((0, 3))
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    return np.add.reduceat(vertices, starts, axis=0) / counts[:, None]
+
+
+def _polygon_cross_products(vertices, counts):
+    # cross products of the centroid to each vertex and the previous one,
+    # as in the loops of normal_polygon and area_polygon
+    vertices = np.asarray(vertices, dtype=float)
+    counts = np.asarray(counts, dtype=int)
+    polygon = np.repeat(np.arange(len(counts)), counts)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    previous = np.arange(len(vertices)) - 1
+    previous[starts] = starts + counts - 1
+    o = centroid_polygons_numpy(vertices, counts)[polygon]
+    return np.cross(vertices[previous] - o, vertices - o), polygon, starts
+
+
+def normal_polygons_numpy(vertices, counts, unitized=True):
+    """Compute the normals of many polygons at once.
+
+    The batch equivalent of ``normal_polygon`` applied to every polygon.
+
+    Parameters
+    ----------
+    vertices : array_like
+        The vertices of all polygons, shaped (n, 3), as from ``flatten_polygons``.
+    counts : array_like
+        The number of vertices of each polygon, at least three.
+    unitized : bool, optional
+        Return unit normals, default is ``True``.
+
+    Returns
+    -------
+    ndarray
+        The normal vectors, shaped (polygons, 3).
+
+    Examples
+    --------
+    >>> normal_polygons_numpy([[0, 0, 0], [2, 0, 0], [2, 2, 0], [0, 2, 0]], [4]).tolist()
+    [[0.0, 0.0, 1.0]]
+
+    """
+    if not len(counts):
+        return np.zeros((0, 3))
+    cross, _, starts = _polygon_cross_products(vertices, counts)
+    normals = np.add.reduceat(cross, starts, axis=0)
+    if not unitized:
+        return normals
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1.0
+    return normals / lengths[:, None]
+
+
+def area_polygons_numpy(vertices, counts):
+    """Compute the areas of many polygons at once.
+
+    The batch equivalent of ``area_polygon`` applied to every polygon.
+
+    Parameters
+    ----------
+    vertices : array_like
+        The vertices of all polygons, shaped (n, 3), as from ``flatten_polygons``.
+    counts : array_like
+        The number of vertices of each polygon.
+
+    Returns
+    -------
+    ndarray
+        The areas of the polygons.
+
+    Examples
+    --------
+    >>> vertices = [[0, 0, 0], [2, 0, 0], [2, 2, 0], [0, 2, 0], [0, 0, 0], [1, 0, 0], [0, 0, 1]]
+    >>> area_polygons_numpy(vertices, [4, 3]).tolist()
+    [4.0, 0.5]
+
+    """
+    if not len(counts):
+        return np.zeros(0)
+    cross, polygon, starts = _polygon_cross_products(vertices, counts)
+    lengths = 0.5 * np.linalg.norm(cross, axis=1)
+    signs = np.einsum('ij,ij->i', cross, cross[starts][polygon]) > 0
+    signs[starts] = True
+    return np.add.reduceat(np.where(signs, lengths, -lengths), starts)
+
+
+def area_polygons(polygons):
+    """Compute the areas of many polygons.
+
+    Uses ``area_polygons_numpy`` if NumPy is available, and ``area_polygon``
+    on every polygon otherwise, e.g. in IronPython.
+
+    Parameters
+    ----------
+    polygons : list
+        The polygons, each a sequence of XYZ coordinates.
+
+    Returns
+    -------
+    list
+        The areas of the polygons.
+
+    Examples
+    --------
+    >>> area_polygons([[[0, 0, 0], [2, 0, 0], [2, 2, 0], [0, 2, 0]]])
+    [4.0]
+
+    """
+    if np is None:
+        return [area_polygon(polygon) for polygon in polygons]
+    return area_polygons_numpy(*flatten_polygons(polygons)).tolist()
+
+
+def normal_polygons(polygons, unitized=True):
+    """Compute the normals of many polygons.
+
+    Uses ``normal_polygons_numpy`` if NumPy is available, and
+    ``normal_polygon`` on every polygon otherwise, e.g. in IronPython.
+
+    Parameters
+    ----------
+    polygons : list
+        The polygons, each a sequence of at least three XYZ coordinates.
+    unitized : bool, optional
+        Return unit normals, default is ``True``.
+
+    Returns
+    -------
+    list
+        The normal vectors of the polygons.
+
+    Examples
+    --------
+    >>> normal_polygons([[[0, 0, 0], [2, 0, 0], [2, 2, 0], [0, 2, 0]]])
+    [[0.0, 0.0, 1.0]]
+
+    """
+    if np is None:
+        return [list(normal_polygon(polygon, unitized)) for polygon in polygons]
+    return normal_polygons_numpy(*flatten_polygons(polygons), unitized=unitized).tolist()
+
+
+def centroid_polygons(polygons):
+    """Compute the centroids of the vertices of many polygons.
+
+    Uses ``centroid_polygons_numpy`` if NumPy is available, and
+    ``centroid_points`` on every polygon otherwise, e.g. in IronPython.
+
+    Parameters
+    ----------
+    polygons : list
+        The polygons, each a sequence of XYZ coordinates.
+
+    Returns
+    -------
+    list
+        XYZ coordinates of the centroids.
+
+    Examples
+    --------
+    >>> centroid_polygons([[[0, 0, 0], [2, 0, 0], [2, 2, 0], [0, 2, 0]]])
+    [[1.0, 1.0, 0.0]]
+
+    """
+    if np is None:
+        return [centroid_points(polygon) for polygon in polygons]
+    return centroid_polygons_numpy(*flatten_polygons(polygons)).tolist()
+
+
+def unique_points(points, tolerance=0.001):
+    """Find the points that are not within a tolerance of an earlier point.
+
+    Points are hashed into cells the size of the tolerance, so each point is
+    only compared to the points of its own and the neighbouring cells. Uses
+    ``unique_points_numpy`` if NumPy is available.
+
+    Parameters
+    ----------
+    points : list
+        XYZ coordinates of the points.
+    tolerance : float, optional
+        The distance under which two points are the same, default is ``0.001``.
+
+    Returns
+    -------
+    list
+        The indices of the unique points, in ascending order.
+
+    Examples
+    --------
+    >>> unique_points([[0, 0, 0], [1, 0, 0], [0.0004, 0, 0], [1, 0, 0]])
+    [0, 1]
+
+    """
+    if np is not None:
+        return unique_points_numpy(points, tolerance).tolist()
+    cells = {}
+    unique = []
+    tol2 = tolerance ** 2
+    for i, point in enumerate(points):
+        cell = [int(floor(point[j] / tolerance)) for j in range(3)]
+        duplicate = False
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for other in cells.get((cell[0] + dx, cell[1] + dy, cell[2] + dz), ()):
+                        if length_vector_sqrd(subtract_vectors(point, other)) <= tol2:
+                            duplicate = True
+        cells.setdefault(tuple(cell), []).append(point)
+        if not duplicate:
+            unique.append(i)
+    return unique
+
+
+def unique_points_numpy(points, tolerance=0.001):
+    """Find the points that are not within a tolerance of an earlier point, at once.
+
+    The batch equivalent of ``unique_points``. The points are hashed into
+    cells of at least the size of the tolerance, sorted by cell, and the
+    points of each cell are paired with the points of the neighbouring cells
+    with a binary search.
+
+    Parameters
+    ----------
+    points : array_like
+        XYZ coordinates of the points, shaped (n, 3).
+    tolerance : float, optional
+        The distance under which two points are the same, default is ``0.001``.
+
+    Returns
+    -------
+    ndarray
+        The indices of the unique points, in ascending order.
+
+    Examples
+    --------
+    >>> unique_points_numpy([[0, 0, 0], [1, 0, 0], [0.0004, 0, 0], [1, 0, 0]]).tolist()
+    [0, 1]
+
+    """
+    points = np.asarray(points, dtype=float).reshape((-1, 3))
+    n = len(points)
+    if not n:
+        return np.zeros(0, dtype=int)
+
+    # cells grow with the extent of the points, so that packed keys fit in int64
+    extent = float((points.max(axis=0) - points.min(axis=0)).max())
+    size = max(tolerance, extent / 2e6)
+    cells = np.floor((points - points.min(axis=0)) / size).astype(np.int64) + 1
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    duplicate = np.zeros(n, dtype=bool)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                neighbours = keys + (dx * dims[1] + dy) * dims[2] + dz
+                start = np.searchsorted(sorted_keys, neighbours, side='left')
+                stop = np.searchsorted(sorted_keys, neighbours, side='right')
+                counts = stop - start
+                if not counts.any():
+                    continue
+                i = np.repeat(np.arange(n), counts)
+                j = order[np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+                close = (j < i) & (((points[i] - points[j]) ** 2).sum(axis=1) <= tolerance ** 2)
+                duplicate[i[close]] = True
+    return np.flatnonzero(~duplicate)
+
+
+ORIENTATIONS = ('north', 'east', 'south', 'west', 'floor', 'roof')
+
+
+def classify_polygons(polygons, zones, tolerance=0.001):
+    """Classify the faces of closed zones as ``Building.compute_surfaces`` does.
+
+    Faces whose centroid key is found more than once are shared by two zones.
+    The other faces are binned by their normal, turned to point away from the
+    centroid of their zone: vertical faces into north, east, south and west
+    by the angle of the normal to the Y axis, and the others into floor and
+    roof. Uses NumPy if available.
+
+    Parameters
+    ----------
+    polygons : list
+        The faces of all zones, each a sequence of XYZ coordinates.
+    zones : list
+        The zone of each face.
+    tolerance : float, optional
+        The size of the quantization step of the centroid keys, default is ``0.001``.
+
+    Returns
+    -------
+    list
+        The orientation of each face, one of ``ORIENTATIONS``, or ``None``
+        for shared faces.
+
+    Examples
+    --------
+    >>> floor = [[0, 0, 0], [0, 1, 0], [1, 1, 0], [1, 0, 0]]
+    >>> east = [[1, 0, 0], [1, 1, 0], [1, 1, 1], [1, 0, 1]]
+    >>> south = [[0, 0, 0], [1, 0, 0], [1, 0, 1], [0, 0, 1]]
+    >>> classify_polygons([floor, east, south, east], ['a', 'a', 'a', 'b'])
+    ['floor', None, 'south', None]
+
+    """
+    index = {}
+    zones = [index.setdefault(zone, len(index)) for zone in zones]
+
+    if np is None:
+        centroids = [centroid_points(polygon) for polygon in polygons]
+        keys = [geometric_key_int(centroid, tolerance) for centroid in centroids]
+        occurrences = {}
+        for key in keys:
+            occurrences[key] = occurrences.get(key, 0) + 1
+        sums = {}
+        for zone, centroid in zip(zones, centroids):
+            total, count = sums.get(zone, ([0., 0., 0.], 0))
+            sums[zone] = add_vectors(total, centroid), count + 1
+        centers = {zone: scale_vector(total, 1. / count) for zone, (total, count) in sums.items()}
+        labels = []
+        for polygon, zone, centroid, key in zip(polygons, zones, centroids, keys):
+            if occurrences[key] > 1:
+                labels.append(None)
+                continue
+            nx, ny, nz = normal_polygon(polygon)
+            if dot_vectors([nx, ny, nz], subtract_vectors(centroid, centers[zone])) < 0:
+                nx, ny, nz = -nx, -ny, -nz
+            labels.append(_orientation(nx, ny, nz))
+        return labels
+
+    vertices, counts = flatten_polygons(polygons)
+    centroids = centroid_polygons_numpy(vertices, counts)
+    _, inverse, occurrences = np.unique(geometric_keys_numpy(centroids, tolerance), axis=0,
+                                        return_inverse=True, return_counts=True)
+    shared = occurrences[inverse.ravel()] > 1
+
+    zones = np.array(zones, dtype=int)
+    faces = np.bincount(zones, minlength=len(index))
+    centers = np.stack([np.bincount(zones, weights=centroids[:, i], minlength=len(index)) for i in range(3)], axis=1)
+    centers /= faces[:, None]
+    normals = normal_polygons_numpy(vertices, counts)
+    normals[np.einsum('ij,ij->i', normals, centroids - centers[zones]) < 0] *= -1
+
+    nx, ny, nz = normals.T
+    angle = np.degrees(np.arccos(np.clip(ny, -1., 1.)))
+    vertical = np.abs(nz) < 1e-6
+    side = (angle > 45) & (angle < 135)
+    codes = np.select([~vertical & (nz < 0), ~vertical, side & (nx > 0), angle > 135, side & (nx < 0)],
+                      [4, 5, 1, 2, 3], default=0)
+    return [None if s else ORIENTATIONS[code] for s, code in zip(shared.tolist(), codes.tolist())]
+
+
+def _orientation(nx, ny, nz):
+    # the bins of Building.compute_surfaces, for a unit normal pointing out
+    if abs(nz) >= 1e-6:
+        return 'floor' if nz < 0 else 'roof'
+    angle = acos(max(-1., min(1., ny))) * 180. / pi
+    if angle < 135 and angle > 45 and nx > 0:
+        return 'east'
+    elif angle > 135:
+        return 'south'
+    elif angle < 135 and angle > 45 and nx < 0:
+        return 'west'
+    return 'north'
+
+
+def volume_polyhedron(polygons):
+    """Compute the volume of a closed polyhedron from its faces.
+
+    The polyhedron is split into pyramids from the centroid of its face
+    centroids to every face, so the faces may be wound either way, as long
+    as the polyhedron is star-shaped from that point, as convex zones are.
+    Uses NumPy if available.
+
+    Parameters
+    ----------
+    polygons : list
+        The faces of the polyhedron, each a sequence of XYZ coordinates.
+
+    Returns
+    -------
+    float
+        The volume.
+
+    Examples
+    --------
+    >>> floor = [[0, 0, 0], [2, 0, 0], [2, 1, 0], [0, 1, 0]]
+    >>> roof = [[0, 0, 3], [2, 0, 3], [2, 1, 3], [0, 1, 3]]
+    >>> walls = [[floor[i], floor[i - 1], roof[i - 1], roof[i]] for i in range(4)]
+    >>> volume_polyhedron([floor, roof] + walls)
+    6.0
+
+    """
+    if not polygons:
+        return 0.
+    if np is None:
+        centroids = [centroid_points(polygon) for polygon in polygons]
+        o = centroid_points(centroids)
+        volume = 0.
+        for polygon, centroid in zip(polygons, centroids):
+            height = dot_vectors(normal_polygon(polygon), subtract_vectors(centroid, o))
+            volume += fabs(height) * area_polygon(polygon)
+        return volume / 3.
+    vertices, counts = flatten_polygons(polygons)
+    centroids = centroid_polygons_numpy(vertices, counts)
+    heights = np.einsum('ij,ij->i', normal_polygons_numpy(vertices, counts), centroids - centroids.mean(axis=0))
+    return float(np.dot(np.abs(heights), area_polygons_numpy(vertices, counts)) / 3.)
+
+
+def _polygon_edges_xy(polygons):
+    # start and end points of the edges of closed or open rings, in XY
+    starts = []
+    ends = []
+    for polygon in polygons:
+        points = [[p[0], p[1]] for p in polygon]
+        if points[0] == points[-1]:
+            points = points[:-1]
+        starts.extend(points)
+        ends.extend(points[1:] + points[:1])
+    return np.array(starts, dtype=float).reshape((-1, 2)), np.array(ends, dtype=float).reshape((-1, 2))
+
+
+def points_in_polygons_xy_numpy(points, polygons, tolerance=1e-6):
+    """Test which points lie inside polygons in the XY plane, at once.
+
+    A point is inside if a ray from it crosses the edges of all polygons an
+    odd number of times, so a polygon inside another is a hole, or if it is
+    within the tolerance of an edge. Z coordinates are ignored.
+
+    Parameters
+    ----------
+    points : array_like
+        XY(Z) coordinates of the points, shaped (n, 2) or (n, 3).
+    polygons : list
+        The polygons, each a sequence of XY(Z) coordinates, closed or not.
+    tolerance : float, optional
+        The distance to an edge under which a point is on it, default is ``1e-6``.
+
+    Returns
+    -------
+    ndarray
+        ``True`` for the points inside or on the edges of the polygons.
+
+    Examples
+    --------
+    >>> square = [[0, 0], [4, 0], [4, 4], [0, 4]]
+    >>> hole = [[1, 1], [3, 1], [3, 3], [1, 3]]
+    >>> points_in_polygons_xy_numpy([[0.5, 0.5], [2, 2], [4, 2], [5, 2]], [square, hole]).tolist()
+    [True, False, True, False]
+
+    """
+    points = np.asarray(points, dtype=float).reshape((len(points), -1))[:, :2] if len(points) else np.zeros((0, 2))
+    a, b = _polygon_edges_xy(polygons)
+    d = b - a
+    lengths = (d ** 2).sum(axis=1)
+    lengths[lengths == 0] = 1.
+    inside = np.zeros(len(points), dtype=bool)
+    if not len(a):
+        return inside
+    # only the points in the bounding box of the polygons can be inside
+    lower = np.minimum(a, b).min(axis=0) - tolerance
+    upper = np.maximum(a, b).max(axis=0) + tolerance
+    candidates = np.flatnonzero(((points >= lower) & (points <= upper)).all(axis=1))
+    step = max(1, 2 ** 20 // len(a))
+    for i in range(0, len(candidates), step):
+        index = candidates[i:i + step]
+        px = points[index, 0, None]
+        py = points[index, 1, None]
+        crosses = (a[:, 1] > py) != (b[:, 1] > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = a[:, 0] + (py - a[:, 1]) * d[:, 0] / d[:, 1]
+        odd = (crosses & (px < x)).sum(axis=1) % 2 == 1
+        inside[index] = odd
+        # the other points may still be on an edge
+        px = px[~odd]
+        py = py[~odd]
+        t = np.clip(((px - a[:, 0]) * d[:, 0] + (py - a[:, 1]) * d[:, 1]) / lengths, 0., 1.)
+        distances = (px - a[:, 0] - t * d[:, 0]) ** 2 + (py - a[:, 1] - t * d[:, 1]) ** 2
+        inside[index[~odd]] = distances.min(axis=1, initial=np.inf) <= tolerance ** 2
+    return inside
+
+
+def intersection_segments_polygons_xy_numpy(starts, ends, polygons, tolerance=1e-9):
+    """Find where segments first cross the edges of polygons in the XY plane, at once.
+
+    Parameters
+    ----------
+    starts : array_like
+        XY(Z) coordinates of the start points of the segments, shaped (n, 2) or (n, 3).
+    ends : array_like
+        XY(Z) coordinates of the end points of the segments.
+    polygons : list
+        The polygons, each a sequence of XY(Z) coordinates, closed or not.
+    tolerance : float, optional
+        The tolerance on the edge parameters, default is ``1e-9``.
+
+    Returns
+    -------
+    ndarray
+        The parameter along each segment, from 0 at its start to 1 at its
+        end, of its first crossing, or ``nan`` if it does not cross an edge.
+
+    Examples
+    --------
+    >>> square = [[0, 0], [4, 0], [4, 4], [0, 4]]
+    >>> intersection_segments_polygons_xy_numpy([[2, 2], [1, 1]], [[6, 2], [2, 2]], [square]).tolist()
+    [0.5, nan]
+
+    """
+    if not len(starts):
+        return np.zeros(0)
+    p = np.asarray(starts, dtype=float).reshape((len(starts), -1))[:, :2]
+    r = np.asarray(ends, dtype=float).reshape((len(ends), -1))[:, :2] - p
+    a, b = _polygon_edges_xy(polygons)
+    s = b - a
+    params = np.full(len(p), np.nan)
+    step = max(1, 2 ** 20 // max(1, len(a)))
+    for i in range(0, len(p), step):
+        ap = a - p[i:i + step, None]
+        rx = r[i:i + step, 0, None]
+        ry = r[i:i + step, 1, None]
+        denominator = rx * s[:, 1] - ry * s[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (ap[:, :, 0] * s[:, 1] - ap[:, :, 1] * s[:, 0]) / denominator
+            u = (ap[:, :, 0] * ry - ap[:, :, 1] * rx) / denominator
+        valid = (denominator != 0) & (t >= -tolerance) & (t <= 1 + tolerance) & (u >= -tolerance) & (u <= 1 + tolerance)
+        t = np.where(valid, t, np.inf).min(axis=1)
+        params[i:i + step] = np.where(np.isinf(t), np.nan, np.clip(t, 0., 1.))
+    return params
@@ -3,6 +3,14 @@ try:
 except:
     pass
 
+try:
+    import numpy as np
+except:
+    pass
+
+from carbon_tool.functions.geometry import points_in_polygons_xy_numpy
+from carbon_tool.functions.geometry import intersection_segments_polygons_xy_numpy
+
 
 def make_grid_structure(sp, span_x, span_y, xaxis, yaxis, height, cores):
 
@@ -152,5 +160,136 @@ def trim_beam(beam, srf, pls):
         rs.DeleteObject(beam)
         return None
 
+def make_grid_structure_numpy(sp, span_x, span_y, xaxis, yaxis, height, cores):
+    """
+    Makes the columns, beams and cores of a structural grid as arrays, without Rhino.
+
+    The headless equivalent of ``make_grid_structure``: the grid points are
+    offset from the start point by the cumulative spans along the axes, the
+    columns run from the top of each grid point down to it, the beams lie
+    at the top and the cores at the bottom.
+
+    Parameters
+    ----------
+    sp: list
+        XYZ coordinates of the start point, the origin by default
+    span_x: list
+        The spans along the x axis, the first one from the start point
+    span_y: list
+        The spans along the y axis, the first one from the start point
+    xaxis: list
+        The direction of the x axis, X by default
+    yaxis: list
+        The direction of the y axis, Y by default
+    height: float
+        The height of the columns
+    cores: list
+        The x and y grid indices of the corner of each core, one after the other
+
+    Return
+    ------
+    ndarray
+        The columns, shaped (columns, 2, 3)
+    ndarray
+        The beams along the y axis, named ``beams_x`` as in ``make_grid_structure``
+    ndarray
+        The beams along the x axis
+    ndarray
+        The closed core polylines, shaped (cores, 5, 3)
+
+    """
+    sp = np.zeros(3) if sp is None else np.asarray(sp, dtype=float)
+    vx = np.array([1., 0., 0.]) if xaxis is None else np.asarray(xaxis, dtype=float) / np.linalg.norm(xaxis)
+    vy = np.array([0., 1., 0.]) if yaxis is None else np.asarray(yaxis, dtype=float) / np.linalg.norm(yaxis)
+
+    x = np.cumsum(np.asarray(span_x, dtype=float))
+    y = np.cumsum(np.asarray(span_y, dtype=float))
+    pts = sp + x[:, None, None] * vx + y[None, :, None] * vy
+    top = pts + [0., 0., height]
+
+    columns = np.stack([top, pts], axis=2).reshape((-1, 2, 3))
+    beams_x = np.stack([top[:, :-1], top[:, 1:]], axis=2).reshape((-1, 2, 3))
+    beams_y = np.stack([top[:-1, :], top[1:, :]], axis=2).reshape((-1, 2, 3))
+
+    i = np.asarray(cores[0::2], dtype=int)[:, None] + [0, 1, 1, 0, 0]
+    j = np.asarray(cores[1::2], dtype=int)[:, None] + [0, 0, 1, 1, 0]
+    cores_ = pts[i, j].reshape((-1, 5, 3))
+    return columns, beams_x, beams_y, cores_
+
+
+def trim_structure_numpy(pls, columns, beams_x, beams_y, cores, min_length=1.):
+    """
+    Trims a structural grid to a floor plan, at once and without Rhino.
+
+    The headless equivalent of ``trim_structure``, with the same rules in
+    plan: columns are kept if they stand inside the plan, beams if both of
+    their ends are inside, cores if all of their vertices are inside, and
+    beams with one end inside are cut where they first cross the plan
+    outline. Points on the outline are inside. The structure is not moved
+    to the elevation of the plan, its elevation is the one of the grid.
+
+    Parameters
+    ----------
+    pls: list
+        The plan polylines, each a sequence of XYZ coordinates. Polylines
+        inside another are holes
+    columns: array_like
+        The columns, shaped (columns, 2, 3)
+    beams_x: array_like
+        The beams along one axis, shaped (beams, 2, 3)
+    beams_y: array_like
+        The beams along the other axis
+    cores: array_like
+        The core polylines, shaped (cores, vertices, 3)
+    min_length: float
+        Cut beams as short as this are dropped, default is 1
+
+    Return
+    ------
+    ndarray
+        The columns
+    ndarray
+        The beams along the first axis
+    ndarray
+        The beams along the other axis
+    ndarray
+        The cores
+
+    """
+    columns = np.asarray(columns, dtype=float).reshape((-1, 2, 3))
+    beams_x = np.array(beams_x, dtype=float).reshape((-1, 2, 3))
+    beams_y = np.array(beams_y, dtype=float).reshape((-1, 2, 3))
+    cores = np.asarray(cores, dtype=float).reshape((len(cores), -1, 3)) if len(cores) else np.zeros((0, 1, 3))
+
+    # the grid points are shared by columns, beams and cores, so each is tested once
+    points = np.concatenate([columns[:, 0], beams_x.reshape((-1, 3)), beams_y.reshape((-1, 3)), cores.reshape((-1, 3))])
+    xy, inverse = np.unique(points[:, 0] + 1j * points[:, 1], return_inverse=True)
+    inside = points_in_polygons_xy_numpy(np.column_stack([xy.real, xy.imag]), pls)[inverse.ravel()]
+    sizes = np.cumsum([len(columns), beams_x.size // 3, beams_y.size // 3])
+    col_in, bx_in, by_in, core_in = np.split(inside, sizes)
+
+    columns = columns[col_in]
+    beams_x = _trim_beams(pls, beams_x, bx_in.reshape((-1, 2)), min_length)
+    beams_y = _trim_beams(pls, beams_y, by_in.reshape((-1, 2)), min_length)
+    cores = cores[core_in.reshape(cores.shape[:2]).all(axis=1)]
+    return columns, beams_x, beams_y, cores
+
+
+def _trim_beams(pls, beams, inside, min_length):
+    a_in = inside[:, 0]
+    b_in = inside[:, 1]
+    keep = a_in & b_in
+
+    # beams with one end inside run from it to the first crossing of the outline
+    flip = b_in & ~a_in
+    beams[flip] = beams[flip][:, ::-1]
+    cut = np.flatnonzero(a_in != b_in)
+    sp = beams[cut, 0]
+    t = intersection_segments_polygons_xy_numpy(sp, beams[cut, 1], pls)
+    beams[cut, 1] = sp + np.nan_to_num(t)[:, None] * (beams[cut, 1] - sp)
+    keep[cut] = ~np.isnan(t) & (np.linalg.norm(beams[cut, 1] - sp, axis=1) > min_length)
+    return beams[keep]
+
+
 if __name__ == '__main__':
     pass
@@ -1,63 +1,934 @@
-__author__ = ["Tomas Mendez Echenagucia"]
-__copyright__ = "University of Washington 2023"
-__license__ = "MIT License"
-__email__ = "tmendeze@uw.edu"
-__version__ = "0.1.0"
-
-
-import os
-import carbon_tool
-
-def read_materials(material_name):
-    filepath = os.path.join(carbon_tool.DATA, 'materials', 'materials.csv')
-    fh = open(filepath, 'r')
-    lines = fh.readlines()
-    fh.close()
-    del(lines[0])
-    materials = {}
-    for line in lines:
-        data = line.split(',')
-        
-        for i in range(len(data)):
-            try:
-                data[i] = float(data[i])
-            except:
-                pass
-        materials[data[0]]   = {'mtype': data[1],
-                                'r_value': data[2],
-                                'r_per_in': data[3],
-                                'thickness_in': data[4],
-                                'thickness_m': data[5], 
-                                'conductivity': data[6], 
-                                'density': data[7],
-                                'sp_heat': data[8],
-                                'embodied_carbon': data[9]}
-    return materials[material_name]
-
-def read_materials_city(material, city):
-    # city_dict = {'National': 2, 'Seattle':3, 'Milwaukee':4, 'San Antonio':5}
-    filepath = os.path.join(carbon_tool.DATA, 'materials', 'materials_embodied.csv')
-    fh = open(filepath, 'r')
-    lines = fh.readlines()
-    fh.close()
-    data = {}
-    del(lines[0])
-    for l in lines:
-        l = l.split(',')
-        data[l[0]] = {'National': float(l[2]),
-                      'Seattle': float(l[3]),
-                      'Milwaukee': float(l[4]),
-                      'San Antonio': float(l[5]),
-                      'Los Angeles': float(l[6]),
-                      'Atlanta': float(l[7]),
-                      'New York': float(l[8])}
-
-    # if data[material][city] == 0:
-    #     return data[material]['National']
-    # else:
-    #     return data[material][city]
-    # return data[material][city]
-    return data[material]['National']
-
-if __name__ == "__main__":
-    pass
+__author__ = ["Tomas Mendez Echenagucia"]
+__copyright__ = "University of Washington 2023"
+__license__ = "MIT License"
+__email__ = "tmendeze@uw.edu"
+__version__ = "0.1.0"
+
+
+import io
+import os
+import csv
+import mmap
+import struct
+import zipfile
+import threading
+import carbon_tool
+
+from xml.etree import ElementTree
+
+try:
+    import numpy as np
+except:
+    np = None
+
+
+__all__ = ['MaterialCatalog',
+           'MaterialTables',
+           'CompiledMaterialTables',
+           'compile_materials',
+           'read_compiled_materials',
+           'read_conversions_xlsx',
+           'read_materials',
+           'read_materials_city',
+           'read_materials_batch',
+           'read_conversions',
+           ]
+
+
+MATERIAL_KEYS = ['mtype',
+                 'r_value',
+                 'r_per_in',
+                 'thickness_in',
+                 'thickness_m',
+                 'conductivity',
+                 'density',
+                 'sp_heat',
+                 'embodied_carbon']
+
+CITIES = ['National',
+          'Seattle',
+          'Milwaukee',
+          'San Antonio',
+          'Los Angeles',
+          'Atlanta',
+          'New York']
+
+NATIONAL = 'national'
+REGIONAL = 'regional'
+
+DB_MAGIC = b'CTMATDB\x00'
+DB_VERSION = 2
+
+DB_BLOCKS = ['string_offsets',
+             'string_data',
+             'material_keys',
+             'material_names',
+             'material_values',
+             'material_strings',
+             'cities',
+             'embodied_names',
+             'embodied_gwp',
+             'gwp_names',
+             'gwp_matrix',
+             'gwp_thickness',
+             'gwp_density',
+             'conversion_keys',
+             'conversion_values']
+# magic, version, string / material / key / embodied / city / conversion / gwp row counts,
+# (size, mtime) of the three source files and the offsets of the data blocks.
+DB_HEADER = struct.Struct('<8s8I' + 'qd' * 3 + '{}Q'.format(len(DB_BLOCKS)))
+DB_COUNTS = ['strings', 'materials', 'keys', 'embodied', 'cities', 'conversions', 'gwp']
+
+XLSX_NS = {'m': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+class MaterialCatalog(object):
+    """Process-wide, indexed table of the materials data files.
+
+    ``materials.csv``, ``materials_embodied.csv`` and the conversion table in
+    ``conversions_functions.xlsx`` are loaded once. If a compiled database
+    (see ``compile_materials``) exists, is up to date with the source files
+    and NumPy is available, it is memory-mapped and lookups read its columns
+    in place instead of parsing the sources. The conversion table is only
+    read on the first ``conversion`` call. Every lookup compares the files
+    modification times with the ones seen at load time, and the tables are
+    reloaded only if a file changed on disk.
+
+    Every load builds a new, read-only tables object that replaces the
+    previous one in a single assignment, and every lookup reads from one
+    tables object, so a single catalog can be shared between threads and a
+    reload never mixes old and new tables.
+
+    The embodied carbon is indexed as a dense material x city matrix
+    (``gwp_matrix``), where zero or missing city values are already replaced
+    by the national value. Lookups then pick a column according to a
+    ``policy``: ``'national'`` always reads the national column,
+    ``'regional'`` reads the column of the given city, or the national one
+    for cities without regional data.
+
+    Parameters
+    ----------
+    materials_path : str, optional
+        Path to the materials properties csv file.
+    embodied_path : str, optional
+        Path to the city embodied carbon csv file.
+    conversions_path : str, optional
+        Path to the conversion functions spreadsheet.
+    compiled_path : str, optional
+        Path to the compiled materials database.
+
+    """
+
+    materials_encoding = 'latin-1'
+    embodied_encoding = 'utf-8'
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, materials_path=None, embodied_path=None, conversions_path=None, compiled_path=None):
+        folder = os.path.join(carbon_tool.DATA, 'materials')
+        if not materials_path:
+            materials_path = os.path.join(folder, 'materials.csv')
+        if not embodied_path:
+            embodied_path = os.path.join(folder, 'materials_embodied.csv')
+        if not conversions_path:
+            conversions_path = os.path.join(folder, 'conversions_functions.xlsx')
+        if not compiled_path:
+            compiled_path = os.path.join(folder, 'materials.ctdb')
+        self.materials_path = materials_path
+        self.embodied_path = embodied_path
+        self.conversions_path = conversions_path
+        self.compiled_path = compiled_path
+        self._state = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def shared(cls):
+        """Returns the catalog shared by the whole process, created on first use.
+        """
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @property
+    def sources(self):
+        return [self.materials_path, self.embodied_path, self.conversions_path]
+
+    @property
+    def compiled(self):
+        return self.tables().compiled
+
+    @property
+    def materials(self):
+        return self.tables().materials
+
+    @property
+    def embodied(self):
+        return self.tables().embodied
+
+    @property
+    def conversions(self):
+        return self.tables().conversions
+
+    @property
+    def material_codes(self):
+        return self.tables().material_codes
+
+    @property
+    def city_codes(self):
+        return self.tables().city_codes
+
+    @property
+    def gwp_matrix(self):
+        return self.tables().gwp_matrix
+
+    def _current_mtimes(self):
+        return tuple(_file_signature(path) for path in self.sources + [self.compiled_path])
+
+    def tables(self):
+        """Returns the current tables, reloaded first if a data file changed.
+
+        Callers that make several lookups should keep the returned object,
+        so that all of them read the same version of the data.
+
+        Returns
+        -------
+        object
+            The tables, with ``materials``, ``embodied``, ``conversions``,
+            ``material_codes``, ``city_codes`` and ``gwp_matrix``.
+
+        """
+        self.refresh()
+        return self._state[1]
+
+    def refresh(self, force=False):
+        """Reloads the tables if any data file changed since they were last loaded.
+
+        Parameters
+        ----------
+        force : bool
+            Reload the tables even if the modification times did not change.
+
+        Returns
+        -------
+        bool
+            True if the tables were (re)loaded.
+
+        """
+        mtimes = self._current_mtimes()
+        state = self._state
+        if not force and state and mtimes == state[0]:
+            return False
+        with self._lock:
+            state = self._state
+            if not force and state and mtimes == state[0]:
+                return False
+            tables = None
+            if mtimes[-1]:
+                tables = read_compiled_materials(self.compiled_path, sources=self.sources)
+            if tables is None:
+                tables = MaterialTables(self._parse_materials(self.materials_path, self.materials_encoding),
+                                        self._parse_embodied(self.embodied_path, self.embodied_encoding),
+                                        self.conversions_path)
+            # the previous tables, and the file they map, stay valid for the readers holding them
+            self._state = mtimes, tables
+        return True
+
+    def parse_sources(self):
+        """Parses the csv files and conversion spreadsheet, ignoring any compiled database.
+
+        Returns
+        -------
+        dict
+            The ``materials``, ``embodied`` and ``conversions`` tables.
+
+        """
+        tables = {}
+        tables['materials'] = self._parse_materials(self.materials_path, self.materials_encoding)
+        tables['embodied'] = self._parse_embodied(self.embodied_path, self.embodied_encoding)
+        tables['conversions'] = _read_conversions_file(self.conversions_path)
+        return tables
+
+    @staticmethod
+    def _read_rows(filepath, encoding):
+        with io.open(filepath, 'r', encoding=encoding, newline='') as fh:
+            rows = list(csv.reader(fh))
+        del rows[0]
+        return rows
+
+    @classmethod
+    def _parse_materials(cls, filepath, encoding):
+        materials = {}
+        for row in cls._read_rows(filepath, encoding):
+            data = []
+            for value in row:
+                try:
+                    data.append(float(value))
+                except ValueError:
+                    data.append(value)
+            materials[data[0]] = dict(zip(MATERIAL_KEYS, data[1:]))
+        return materials
+
+    @classmethod
+    def _parse_embodied(cls, filepath, encoding):
+        embodied = {}
+        for row in cls._read_rows(filepath, encoding):
+            values = {}
+            for i, city in enumerate(CITIES):
+                try:
+                    values[city] = float(row[i + 2])
+                except (IndexError, ValueError):
+                    values[city] = float('nan')
+            embodied[row[0]] = values
+        return embodied
+
+    def city_column(self, city, policy=NATIONAL):
+        """Returns the ``gwp_matrix`` column used for a city under a lookup policy.
+
+        Parameters
+        ----------
+        city : str
+            The name of the city.
+        policy : {'national', 'regional'}
+            National values only, or regional values where available.
+
+        Returns
+        -------
+        int
+            The column index.
+
+        """
+        return _city_column(self.tables().city_codes, city, policy)
+
+    def material(self, material_name):
+        """Returns the properties of a material from ``materials.csv``.
+
+        Parameters
+        ----------
+        material_name : str
+            The name of the material.
+
+        Returns
+        -------
+        dict
+            The material properties, keyed as in ``MATERIAL_KEYS``.
+
+        """
+        return self.tables().material(material_name)
+
+    def gwp(self, material, city, policy=NATIONAL):
+        """Returns the embodied carbon of a material from ``materials_embodied.csv``.
+
+        Parameters
+        ----------
+        material : str
+            The name of the material.
+        city : str
+            The name of the city.
+        policy : {'national', 'regional'}
+            National values only, or regional values where available.
+
+        Returns
+        -------
+        float
+            The embodied carbon in kgCO2/yd3.
+
+        """
+        tables = self.tables()
+        return tables.gwp(material, _city_column(tables.city_codes, city, policy))
+
+    def conversion(self, section):
+        """Returns one section of the conversion functions table.
+
+        Parameters
+        ----------
+        section : str
+            The section title, e.g. ``'R to YD3'``.
+
+        Returns
+        -------
+        dict
+            The section values per material and column.
+
+        """
+        return self.tables().conversions[section]
+
+    def arrays(self):
+        """Returns the catalog as NumPy arrays indexed by integer material and city codes.
+
+        Returns
+        -------
+        dict
+            ``material_codes`` and ``city_codes`` map names to row and column
+            indices of ``gwp`` (``gwp_matrix`` in kgCO2/yd3), ``thickness_in``
+            and ``density`` (NaN where ``materials.csv`` has no value).
+
+        """
+        return self.tables().arrays()
+
+    def encode(self, materials=None, cities=None):
+        """Resolves arrays of material and city names to integer codes.
+
+        Codes stay valid until the catalog is reloaded, so they can be resolved
+        once and reused for any number of ``lookup`` calls.
+
+        Parameters
+        ----------
+        materials : array_like of str, optional
+            Material names.
+        cities : array_like of str, optional
+            City names. Cities without regional data get the national code.
+
+        Returns
+        -------
+        tuple
+            Integer arrays of material and city codes, with the shape of the
+            inputs. None for an input that was not given.
+
+        Raises
+        ------
+        KeyError
+            If a material is not in the catalog.
+
+        """
+        return _encode(self.arrays(), materials, cities)
+
+    def lookup(self, materials, cities, policy=NATIONAL):
+        """Gathers GWP, thickness and density for arrays of materials and cities.
+
+        Parameters
+        ----------
+        materials : array_like
+            Material names, or integer codes from ``encode``.
+        cities : array_like
+            City names, or integer codes from ``encode``. Broadcast against
+            ``materials``, so a single city can be given for all materials.
+        policy : {'national', 'regional'}
+            National values only, or regional values where available.
+
+        Returns
+        -------
+        tuple of ndarray
+            GWP (kgCO2/yd3), thickness (in) and density (kg/m3).
+
+        """
+        arrays = self.arrays()
+        mcodes = np.asarray(materials)
+        if mcodes.dtype.kind not in 'iu':
+            mcodes = _encode(arrays, materials=mcodes)[0]
+        if policy == REGIONAL:
+            ccodes = np.asarray(cities)
+            if ccodes.dtype.kind not in 'iu':
+                ccodes = _encode(arrays, cities=ccodes)[1]
+        else:
+            ccodes = _city_column(arrays['city_codes'], None, policy)
+        mcodes, ccodes = np.broadcast_arrays(mcodes, ccodes)
+        gwp = arrays['gwp'][mcodes, ccodes]
+        return gwp, arrays['thickness_in'][mcodes], arrays['density'][mcodes]
+
+
+class MaterialTables(object):
+    """One loaded version of the materials data, parsed from the source files.
+
+    The tables are not changed once built. The conversion table and the
+    NumPy arrays are built on first use.
+
+    Parameters
+    ----------
+    materials : dict
+        The material properties per material.
+    embodied : dict
+        The embodied carbon per material and city.
+    conversions_path : str
+        Path to the conversion functions spreadsheet.
+
+    """
+
+    compiled = False
+
+    def __init__(self, materials, embodied, conversions_path):
+        self.materials = materials
+        self.embodied = embodied
+        self.conversions_path = conversions_path
+        self.material_codes, self.city_codes, self.gwp_matrix = _index_gwp(materials, embodied)
+        self._conversions = None
+        self._arrays = None
+        self._lock = threading.Lock()
+
+    @property
+    def conversions(self):
+        if self._conversions is None:
+            with self._lock:
+                if self._conversions is None:
+                    self._conversions = self._read_conversions()
+        return self._conversions
+
+    def _read_conversions(self):
+        return _read_conversions_file(self.conversions_path)
+
+    def material(self, name):
+        return dict(self.materials[name])
+
+    def gwp(self, material, column):
+        if material not in self.embodied:
+            raise KeyError(material)
+        return self.gwp_matrix[self.material_codes[material]][column]
+
+    def arrays(self):
+        if self._arrays is None:
+            with self._lock:
+                if self._arrays is None:
+                    codes = self.material_codes
+                    names = sorted(codes, key=codes.get)
+                    self._arrays = {'material_codes': codes,
+                                    'city_codes': self.city_codes,
+                                    'gwp': np.array(self.gwp_matrix, dtype=float),
+                                    'thickness_in': np.array(_material_column(self.materials, names, 'thickness_in')),
+                                    'density': np.array(_material_column(self.materials, names, 'density'))}
+        return self._arrays
+
+
+class CompiledMaterialTables(MaterialTables):
+    """One loaded version of the materials data, read in place from a compiled database.
+
+    The GWP matrix and the numeric columns are NumPy arrays over the
+    memory-mapped file, so processes that map the same database share its
+    pages, and strings are only decoded when a lookup needs them.
+
+    Parameters
+    ----------
+    buffer : mmap
+        The memory-mapped database.
+    counts : dict
+        The number of strings, materials, keys, embodied materials, cities,
+        conversion values and GWP rows.
+    offsets : dict
+        The offset of each block in ``DB_BLOCKS``.
+
+    """
+
+    compiled = True
+
+    def __init__(self, buffer, counts, offsets):
+        self.buffer = buffer
+        self.counts = counts
+
+        def block(name, dtype, shape):
+            size = int(np.prod(shape))
+            return np.frombuffer(buffer, dtype=dtype, count=size, offset=offsets[name]).reshape(shape)
+
+        self._string_offsets = block('string_offsets', '<u4', (counts['strings'] + 1,))
+        self._string_data = offsets['string_data']
+        self._blocks = {}
+        for name, fmt, shape in [('material_keys', '<i4', (counts['keys'],)),
+                                 ('material_names', '<i4', (counts['materials'],)),
+                                 ('material_values', '<f8', (counts['materials'], counts['keys'])),
+                                 ('material_strings', '<i4', (counts['materials'], counts['keys'])),
+                                 ('cities', '<i4', (counts['cities'],)),
+                                 ('embodied_names', '<i4', (counts['embodied'],)),
+                                 ('embodied_gwp', '<f8', (counts['embodied'], counts['cities'])),
+                                 ('gwp_names', '<i4', (counts['gwp'],)),
+                                 ('gwp_matrix', '<f8', (counts['gwp'], counts['cities'])),
+                                 ('gwp_thickness', '<f8', (counts['gwp'],)),
+                                 ('gwp_density', '<f8', (counts['gwp'],)),
+                                 ('conversion_keys', '<i4', (counts['conversions'], 3)),
+                                 ('conversion_values', '<f8', (counts['conversions'],))]:
+            self._blocks[name] = block(name, fmt, shape)
+
+        self.gwp_matrix = self._blocks['gwp_matrix']
+        self.city_codes = {self.string(i): j for j, i in enumerate(self._blocks['cities'].tolist())}
+        self._material_codes = None
+        self._material_rows = None
+        self._materials = None
+        self._embodied = None
+        self._conversions = None
+        self._arrays = None
+        self._lock = threading.Lock()
+
+    def string(self, index):
+        """Decodes one string of the string table."""
+        a, b = self._string_offsets[index:index + 2].tolist()
+        return self.buffer[self._string_data + a: self._string_data + b].decode('utf-8')
+
+    def _names(self, block):
+        return [self.string(i) for i in self._blocks[block].tolist()]
+
+    @property
+    def material_codes(self):
+        if self._material_codes is None:
+            self._material_codes = {name: i for i, name in enumerate(self._names('gwp_names'))}
+        return self._material_codes
+
+    @property
+    def materials(self):
+        if self._materials is None:
+            self._materials = {name: self.material(name) for name in self._names('material_names')}
+        return self._materials
+
+    @property
+    def embodied(self):
+        if self._embodied is None:
+            cities = self._names('cities')
+            gwp = self._blocks['embodied_gwp'].tolist()
+            self._embodied = {name: dict(zip(cities, gwp[i])) for i, name in enumerate(self._names('embodied_names'))}
+        return self._embodied
+
+    def _read_conversions(self):
+        conversions = {}
+        keys = self._blocks['conversion_keys'].tolist()
+        for (section, row, column), value in zip(keys, self._blocks['conversion_values'].tolist()):
+            rows = conversions.setdefault(self.string(section), {})
+            rows.setdefault(self.string(row), {})[self.string(column)] = value
+        return conversions
+
+    def material(self, name):
+        if self._material_rows is None:
+            self._material_rows = {name: i for i, name in enumerate(self._names('material_names'))}
+        i = self._material_rows[name]
+        keys = self._names('material_keys')
+        values = self._blocks['material_values'][i].tolist()
+        refs = self._blocks['material_strings'][i].tolist()
+        return {key: value if ref < 0 else self.string(ref) for key, value, ref in zip(keys, values, refs)}
+
+    def gwp(self, material, column):
+        code = self.material_codes[material]
+        if code >= self.counts['embodied']:
+            raise KeyError(material)
+        return float(self.gwp_matrix[code, column])
+
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = {'material_codes': self.material_codes,
+                            'city_codes': self.city_codes,
+                            'gwp': self.gwp_matrix,
+                            'thickness_in': self._blocks['gwp_thickness'],
+                            'density': self._blocks['gwp_density']}
+        return self._arrays
+
+
+def _index_gwp(materials, embodied):
+    # the rows of the materials with embodied carbon come first
+    names = sorted(embodied)
+    names += sorted(set(materials) - set(embodied))
+    matrix = []
+    for name in names:
+        if name not in embodied:
+            matrix.append([float('nan')] * len(CITIES))
+            continue
+        national = embodied[name]['National']
+        row = []
+        for city in CITIES:
+            value = embodied[name].get(city)
+            if not value or value != value:
+                value = national
+            row.append(value)
+        matrix.append(row)
+    material_codes = {name: i for i, name in enumerate(names)}
+    city_codes = {city: i for i, city in enumerate(CITIES)}
+    return material_codes, city_codes, matrix
+
+
+def _material_column(materials, names, key):
+    values = []
+    for name in names:
+        value = materials.get(name, {}).get(key)
+        values.append(value if isinstance(value, float) else float('nan'))
+    return values
+
+
+def _city_column(city_codes, city, policy):
+    national = city_codes['National']
+    if policy == NATIONAL:
+        return national
+    elif policy == REGIONAL:
+        return city_codes.get(city, national)
+    raise ValueError('Unknown GWP policy: {}'.format(policy))
+
+
+def _encode(arrays, materials=None, cities=None):
+    mcodes = None
+    ccodes = None
+    if materials is not None:
+        mcodes = _encode_names(materials, arrays['material_codes'])
+    if cities is not None:
+        ccodes = _encode_names(cities, arrays['city_codes'], default=arrays['city_codes']['National'])
+    return mcodes, ccodes
+
+
+def _read_conversions_file(filepath):
+    if os.path.exists(filepath):
+        return read_conversions_xlsx(filepath)
+    return {}
+
+
+def _encode_names(names, codes, default=None):
+    names = np.asarray(names)
+    unique, inverse = np.unique(names, return_inverse=True)
+    if default is None:
+        table = [codes[name] for name in unique.tolist()]
+    else:
+        table = [codes.get(name, default) for name in unique.tolist()]
+    return np.array(table, dtype=np.intp)[inverse].reshape(names.shape)
+
+
+def _file_signature(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime
+
+
+def read_materials(material_name):
+    return MaterialCatalog.shared().material(material_name)
+
+
+def read_materials_city(material, city, policy=NATIONAL):
+    return MaterialCatalog.shared().gwp(material, city, policy)
+
+
+def read_materials_batch(materials, cities, policy=NATIONAL):
+    return MaterialCatalog.shared().lookup(materials, cities, policy)
+
+
+def read_conversions():
+    return MaterialCatalog.shared().tables().conversions
+
+
+def read_conversions_xlsx(filepath):
+    """Reads the conversion functions spreadsheet without any Excel dependency.
+
+    The first sheet is split in sections, each one starting with a title cell
+    followed by a header row. Cached cell values are read, so formulas are not
+    evaluated.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the ``.xlsx`` file.
+
+    Returns
+    -------
+    dict
+        ``{section: {material: {column: value}}}``
+
+    """
+    with zipfile.ZipFile(filepath) as archive:
+        strings = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            root = ElementTree.fromstring(archive.read('xl/sharedStrings.xml'))
+            for si in root.findall('m:si', XLSX_NS):
+                strings.append(''.join(t.text or '' for t in si.iter('{%s}t' % XLSX_NS['m'])))
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+
+    conversions = {}
+    section = None
+    header = None
+    for row in sheet.find('m:sheetData', XLSX_NS):
+        cells = []
+        for cell in row:
+            value = cell.find('m:v', XLSX_NS)
+            if value is None:
+                continue
+            if cell.get('t') == 's':
+                cells.append(strings[int(value.text)])
+            else:
+                try:
+                    cells.append(float(value.text))
+                except ValueError:
+                    cells.append(value.text)
+        if not cells:
+            continue
+        if len(cells) == 1:
+            section = cells[0]
+            header = None
+        elif all(not isinstance(c, float) for c in cells):
+            if header is not None or section is None:
+                section = cells[0]
+            header = cells[1:]
+            conversions[section] = {}
+        elif section is not None and header is not None:
+            conversions[section][cells[0]] = dict(zip(header, cells[1:]))
+    return conversions
+
+
+def compile_materials(filepath=None, catalog=None):
+    """Compiles the materials data files into a single binary database.
+
+    The database holds fixed-width numeric columns and a string table, so it
+    can be memory-mapped by ``read_compiled_materials`` without any parsing.
+    The size and modification time of each source file are stored in the
+    header, which is how stale databases are detected.
+
+    Parameters
+    ----------
+    filepath : str, optional
+        Where to write the database. Defaults to the catalog ``compiled_path``.
+    catalog : MaterialCatalog, optional
+        The catalog whose source files are compiled. Defaults to a new catalog
+        over the files in ``carbon_tool.DATA``.
+
+    Returns
+    -------
+    str
+        The path of the compiled database.
+
+    """
+    if not catalog:
+        catalog = MaterialCatalog()
+    if not filepath:
+        filepath = catalog.compiled_path
+    sources = [_file_signature(path) or (0, 0.) for path in catalog.sources]
+    tables = catalog.parse_sources()
+
+    strings = []
+    string_index = {}
+
+    def sid(string):
+        if string not in string_index:
+            string_index[string] = len(strings)
+            strings.append(string)
+        return string_index[string]
+
+    material_names = sorted(tables['materials'])
+    material_values = []
+    material_strings = []
+    for name in material_names:
+        for key in MATERIAL_KEYS:
+            value = tables['materials'][name].get(key, '')
+            if isinstance(value, float):
+                material_values.append(value)
+                material_strings.append(-1)
+            else:
+                material_values.append(float('nan'))
+                material_strings.append(sid(value))
+
+    embodied_names = sorted(tables['embodied'])
+    embodied_gwp = [tables['embodied'][name][city] for name in embodied_names for city in CITIES]
+
+    # the GWP matrix and columns of MaterialCatalog.arrays, read in place when mapped
+    material_codes, _, gwp_matrix = _index_gwp(tables['materials'], tables['embodied'])
+    gwp_names = sorted(material_codes, key=material_codes.get)
+    gwp_values = [value for row in gwp_matrix for value in row]
+    gwp_thickness = _material_column(tables['materials'], gwp_names, 'thickness_in')
+    gwp_density = _material_column(tables['materials'], gwp_names, 'density')
+
+    conversion_keys = []
+    conversion_values = []
+    for section in sorted(tables['conversions']):
+        for row in sorted(tables['conversions'][section]):
+            for column, value in sorted(tables['conversions'][section][row].items()):
+                if not isinstance(value, float):
+                    continue
+                conversion_keys.extend([sid(section), sid(row), sid(column)])
+                conversion_values.append(value)
+
+    blocks = {}
+    blocks['material_keys'] = [sid(key) for key in MATERIAL_KEYS]
+    blocks['material_names'] = [sid(name) for name in material_names]
+    blocks['cities'] = [sid(city) for city in CITIES]
+    blocks['embodied_names'] = [sid(name) for name in embodied_names]
+    blocks['gwp_names'] = [sid(name) for name in gwp_names]
+    blocks['conversion_keys'] = conversion_keys
+
+    data = [s_.encode('utf-8') for s_ in strings]
+    offsets = [0]
+    for d in data:
+        offsets.append(offsets[-1] + len(d))
+
+    packed = {'string_offsets': struct.pack('<{}I'.format(len(offsets)), *offsets),
+              'string_data': b''.join(data),
+              'material_values': struct.pack('<{}d'.format(len(material_values)), *material_values),
+              'material_strings': struct.pack('<{}i'.format(len(material_strings)), *material_strings),
+              'embodied_gwp': struct.pack('<{}d'.format(len(embodied_gwp)), *embodied_gwp),
+              'gwp_matrix': struct.pack('<{}d'.format(len(gwp_values)), *gwp_values),
+              'gwp_thickness': struct.pack('<{}d'.format(len(gwp_thickness)), *gwp_thickness),
+              'gwp_density': struct.pack('<{}d'.format(len(gwp_density)), *gwp_density),
+              'conversion_values': struct.pack('<{}d'.format(len(conversion_values)), *conversion_values)}
+    for key in blocks:
+        packed[key] = struct.pack('<{}i'.format(len(blocks[key])), *blocks[key])
+
+    body = bytearray()
+    block_offsets = []
+    for key in DB_BLOCKS:
+        body.extend(b'\x00' * (-(DB_HEADER.size + len(body)) % 8))
+        block_offsets.append(DB_HEADER.size + len(body))
+        body.extend(packed[key])
+
+    source_fields = []
+    for size, mtime in sources:
+        source_fields.extend([size, mtime])
+    header = DB_HEADER.pack(DB_MAGIC,
+                            DB_VERSION,
+                            len(strings),
+                            len(material_names),
+                            len(MATERIAL_KEYS),
+                            len(embodied_names),
+                            len(CITIES),
+                            len(conversion_values),
+                            len(gwp_names),
+                            *(source_fields + block_offsets))
+
+    temp = filepath + '.tmp'
+    with open(temp, 'wb') as fh:
+        fh.write(header)
+        fh.write(body)
+    os.replace(temp, filepath)
+    return filepath
+
+
+def read_compiled_materials(filepath, sources=None):
+    """Memory-maps a compiled materials database.
+
+    Nothing is parsed: the returned tables read the GWP matrix and numeric
+    columns in place through NumPy, and decode strings on first use.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the database written by ``compile_materials``.
+    sources : list, optional
+        Paths of the materials, embodied and conversion source files. If given,
+        the database is only used if it was compiled from their current version.
+
+    Returns
+    -------
+    CompiledMaterialTables or None
+        The tables. None if NumPy is not available, or if the database is
+        missing, of another version or stale.
+
+    """
+    if np is None:
+        return None
+    try:
+        fh = open(filepath, 'rb')
+    except (IOError, OSError):
+        return None
+    with fh:
+        if os.fstat(fh.fileno()).st_size < DB_HEADER.size:
+            return None
+        buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header = DB_HEADER.unpack_from(buffer, 0)
+    magic, version = header[:2]
+    if magic != DB_MAGIC or version != DB_VERSION:
+        buffer.close()
+        return None
+    counts = dict(zip(DB_COUNTS, header[2:9]))
+
+    if sources:
+        compiled_sources = [tuple(header[9 + 2 * i: 11 + 2 * i]) for i in range(len(sources))]
+        for path, compiled in zip(sources, compiled_sources):
+            current = _file_signature(path)
+            if current is not None and current != compiled:
+                buffer.close()
+                return None
+
+    offsets = dict(zip(DB_BLOCKS, header[15:]))
+    return CompiledMaterialTables(buffer, counts, offsets)
+
+
+if __name__ == "__main__":
+    pass
@@ -8,7 +8,7 @@ def make_pies(filename, num_years):
 
     filepath = os.path.join(path, filename)
 
-    b = Building.from_obj(filepath)
+    b = Building.from_file(filepath, lazy=True)
 
     # embodied - - - -
 
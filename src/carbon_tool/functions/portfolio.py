@@ -0,0 +1,197 @@
+from __future__ import print_function
+
+__author__ = ["Tomas Mendez Echenagucia"]
+__copyright__ = "Tomas Mendez Echenagucia - University of Washington"
+__license__ = "MIT License"
+__email__ = "tmendeze@uw.edu"
+__version__ = "0.1.0"
+
+import os
+
+try:
+    import numpy as np
+except:
+    pass
+
+from carbon_tool.functions.write_results import write_operational_csv
+from carbon_tool.functions.write_results import write_results_binary
+
+
+__all__ = ['export_portfolio',
+           'summarize_building',
+          ]
+
+
+SUMMARY_COLUMNS = [('name', 'name'),
+                   ('slab', 'slab (kg CO2e)'),
+                   ('beams_columns', 'beams & columns (kg CO2e)'),
+                   ('core', 'core (kg CO2e)'),
+                   ('windows', 'windows (kg CO2e)'),
+                   ('shading', 'shading (kg CO2e)'),
+                   ('walls', 'walls (kg CO2e)'),
+                   ('embodied', 'total embodied (kg CO2e)'),
+                   ('heating', 'heating (KWh)'),
+                   ('cooling', 'cooling (KWh)'),
+                   ('lighting', 'lighting (KWh)'),
+                   ('operational', 'total operational (KWh)'),
+                   ('floor_area', 'floor area (ft2)'),
+                   ('embodied_ft2', 'embodied / ft2 (kg CO2e / ft2)'),
+                   ('operational_ft2', 'operational / ft2 (KWh / ft2)')]
+
+
+def export_portfolio(filepaths, out_path, name='portfolio', hourly=None, workers=None):
+    """
+    Consolidates the results of many saved buildings.
+
+    The building files are loaded and summarized in a process pool, and the
+    summaries are written to ``<name>_summary.csv`` in the order of the
+    files, one row per building with the embodied carbon breakdown, the
+    annual operational energy and their intensities per floor area.
+
+    Parameters
+    ----------
+    filepaths: list
+        Paths to the building ``.ctb`` or ``.obj`` files
+    out_path: str
+        The folder to write to
+    name: str
+        The name of the portfolio, used as prefix of the written files
+    hourly: str, optional
+        ``'csv'`` to also write the hourly heating, cooling and lighting of
+        every building to ``<name>_hourly_results.csv``, or ``'ctr'`` to
+        write them to a columnar binary file, with the buildings as zones.
+        All buildings must share the same hours
+    workers: int, optional
+        Number of worker processes, the number of CPUs by default. With one
+        worker the files are read in this process
+
+    Return
+    ------
+    str
+        Path to the summary file
+    str or None
+        Path to the hourly file
+    dict
+        The error message per file that could not be summarized
+
+    """
+    if hourly not in (None, 'csv', 'ctr'):
+        raise ValueError('Unknown hourly format: {}'.format(hourly))
+    jobs = [(filepath, bool(hourly)) for filepath in filepaths]
+    results = [None] * len(jobs)
+
+    if workers == 1:
+        for i, job in enumerate(jobs):
+            results[i] = _summarize_job(*job)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures import as_completed
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_summarize_job, *job): i for i, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = None, None, '{}: {}'.format(type(e).__name__, e)
+
+    errors = {}
+    summaries = []
+    hours = []
+    for filepath, (summary, operational, error) in zip(filepaths, results):
+        if error:
+            errors[filepath] = error
+            continue
+        summaries.append(summary)
+        if operational:
+            hours.append((summary['name'], operational))
+
+    summary_path = os.path.join(out_path, '{}_summary.csv'.format(name))
+    with open(summary_path, 'w') as fh:
+        fh.write(','.join(title for _, title in SUMMARY_COLUMNS) + '\n')
+        for summary in summaries:
+            fh.write(','.join(str(summary[key]) for key, _ in SUMMARY_COLUMNS) + '\n')
+
+    hourly_path = None
+    if hourly and hours:
+        hourly_path = _write_portfolio_hourly(out_path, name, hourly, hours)
+    return summary_path, hourly_path, errors
+
+
+def summarize_building(building):
+    """
+    Summarizes the embodied carbon and annual operational energy of a building.
+
+    Parameters
+    ----------
+    building: object
+        The building, with computed embodied carbon and operational results
+
+    Return
+    ------
+    dict
+        The values of the summary row, keyed as in ``SUMMARY_COLUMNS``
+
+    """
+    structure = building.structure
+    envelope = building.envelope
+    summary = {'name': building.name,
+               'slab': structure.slab_embodied,
+               'beams_columns': structure.beam_embodied + structure.column_embodied + structure.connections_embodied,
+               'core': structure.core_embodied,
+               'windows': envelope.window_embodied,
+               'shading': envelope.shading_embodied,
+               'walls': envelope.wall_embodied}
+    summary['embodied'] = sum(summary[key] for key in ('slab', 'beams_columns', 'core', 'windows', 'shading', 'walls'))
+
+    heat, cool, light = building.report_operational()
+    summary['heating'] = heat
+    summary['cooling'] = cool
+    summary['lighting'] = light
+    summary['operational'] = heat + cool + light
+
+    floor_area = building.floor_area
+    summary['floor_area'] = floor_area
+    summary['embodied_ft2'] = summary['embodied'] / floor_area if floor_area else float('nan')
+    summary['operational_ft2'] = summary['operational'] / floor_area if floor_area else float('nan')
+    return summary
+
+
+def _summarize_job(filepath, hourly):
+    from carbon_tool.datastructures import Building
+
+    try:
+        building = Building.from_file(filepath, output=False, lazy=True)
+        summary = summarize_building(building)
+        operational = None
+        if hourly:
+            times, _, heat, cool, light = building.operational_kwh('hourly')
+            operational = times, np.nansum(heat, axis=1), np.nansum(cool, axis=1), np.nansum(light, axis=1)
+        return summary, operational, None
+    except Exception as e:
+        return None, None, '{}: {}'.format(type(e).__name__, e)
+
+
+def _write_portfolio_hourly(out_path, name, hourly, hours):
+    names = [bname for bname, _ in hours]
+    times = hours[0][1][0]
+    for bname, operational in hours:
+        if operational[0] != times:
+            raise ValueError('The hours of {} differ from the hours of {}'.format(bname, names[0]))
+    heat = np.column_stack([operational[1] for _, operational in hours])
+    cool = np.column_stack([operational[2] for _, operational in hours])
+    light = np.column_stack([operational[3] for _, operational in hours])
+
+    if hourly == 'csv':
+        filepath = os.path.join(out_path, '{}_hourly_results.csv'.format(name))
+        return write_operational_csv(filepath, times, names, heat, cool, light)
+    filepath = os.path.join(out_path, '{}_hourly_results.ctr'.format(name))
+    columns = {'heating': heat, 'cooling': cool, 'lighting': light}
+    units = {'heating': 'KWh', 'cooling': 'KWh', 'lighting': 'KWh'}
+    description = 'Operational energy of portfolio {} per building, heating and cooling divided by a COP of 3'
+    description = description.format(name)
+    return write_results_binary(filepath, times, names, columns, units=units, description=description)
+
+
+if __name__ == '__main__':
+    pass
@@ -7,97 +7,820 @@ __email__ = "tmendeze@uw.edu"
 __version__ = "0.1.0"
 
 
+import os
+import hashlib
+import zipfile
+
+try:
+    import numpy as np
+except:
+    np = None
+
+from carbon_tool.datastructures.results import ResultsStore
+from carbon_tool.functions.container import read_container_header
+from carbon_tool.functions.container import read_container_array
+from carbon_tool.functions.write_results import RESULTS_MAGIC
+from carbon_tool.functions.write_results import RESULTS_VERSION
+
+
 __all__ = ['read_mean_zone_temperatures',
            'read_error_file',
            'read_eso_preamble',
            'read_results_file',
+           'read_results_store',
+           'read_results_many',
+           'read_results_cache',
+           'write_results_cache',
+           'iter_eso_records',
+           'read_results_range',
+           'read_results_index',
+           'write_results_index',
+           'read_results_sql',
+           'read_results_sql_store',
+           'read_results_header',
+           'read_results_column',
+           'read_results_binary',
           ]
 
 
-def read_results_file(building, filepath):
-    pre_dict = read_eso_preamble(building, filepath)
-    building.results = read_eso(building, filepath, pre_dict)
+CACHE_VERSION = 2
+INDEX_VERSION = 1
 
+SQL_PERIODS = {'timestep': ('t.Month', 't.Day', '{start} / 60', '{start} % 60'),
+               'hourly': ('t.Month', 't.Day', '{start} / 60', '0'),
+               'daily': ('t.Month', 't.Day', '0', '0'),
+               'monthly': ('t.Month', '1', '0', '0')}
 
-def read_eso(building, filepath, pre_dict):
-    fh = open(filepath, 'r')
-    lines = fh.readlines()
-    fh.close()
+SQL_FREQUENCIES = {'hvac system timestep': 0,
+                   'zone timestep': 1,
+                   'timestep': 1,
+                   'hourly': 2,
+                   'daily': 3,
+                   'monthly': 4,
+                   'run period': 5,
+                   'annual': 5}
 
-    zones = building.znames
+SQL_BASE_FREQUENCY = {'timestep': 5, 'hourly': 2, 'daily': 3, 'monthly': 4}
+
+
+def read_results_file(building, filepath, cache=False, variables=None, zones=None):
+    if zones is None:
+        zones = building.znames
+    if np is None:
+        # without NumPy, e.g. in IronPython, the results are stored as the nested dict of older versions
+        building.results = _results_dict(iter_eso_records(filepath, zones, variables), zones)
+        return
+    building.results = read_results_store(filepath, zones, cache=cache, variables=variables)
+
+
+def read_results_store(filepath, zones, cache=False, variables=None):
+    """
+    Reads an Energy+ result file into a columnar results store.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ result file
+    zones: list
+        The zone names to read, as in ``Building.znames``
+    cache: bool
+        Read the results from a ``.npz`` sidecar next to the result file if
+        it is up to date, and write one after parsing otherwise
+    variables: list, optional
+        The variables to read, e.g. ``['cooling', 'heating', 'lighting']``.
+        All variables by default. Data lines of other variables and zones
+        are skipped before their values are converted
+
+    Return
+    ------
+    ResultsStore
+        The results shaped (timesteps, zones, variables)
     
-    del lines[:9 + pre_dict['len_preamble']]
-    del lines[-2:]
+    """
+    if cache:
+        store = read_results_cache(filepath, zones, variables)
+        if store is not None:
+            return store
+
+    with open(filepath, 'r') as fh:
+        dictionary = _read_eso_dictionary(fh, zones, variables)
+        found = _eso_variables(dictionary, variables)
+        store = ResultsStore.from_records(_iter_eso_data(fh, dictionary), zones, found)
+
+    if cache:
+        write_results_cache(filepath, store, all_zones=zones is None, all_variables=variables is None)
+    return store
+
+
+def read_results_many(buildings, filepaths, workers=None, cache=False, variables=None):
+    """
+    Reads many Energy+ result files in a process pool.
+
+    Each worker parses one file into a ``ResultsStore`` and sends back its
+    arrays, which are stored in the ``results`` of the matching building.
+    Buildings are yielded as soon as their file is done, in completion order.
+    A file that fails to parse is reported instead of stopping the batch.
+
+    Parameters
+    ----------
+    buildings: list
+        The building objects, one per result file
+    filepaths: list
+        Paths to the energy+ result files
+    workers: int, optional
+        Number of worker processes, the number of CPUs by default. With one
+        worker the files are read in this process
+    cache: bool
+        Use ``.npz`` sidecars, as in ``read_results_store``
+    variables: list, optional
+        The variables to read, all by default
+
+    Yields
+    ------
+    object
+        The building
+    str
+        Path to its result file
+    str or None
+        The error message if the file could not be read, None otherwise
+    
+    """
+    if len(buildings) != len(filepaths):
+        raise ValueError('One result file per building is required')
+    jobs = [(filepath, list(building.znames), cache, variables) for building, filepath in zip(buildings, filepaths)]
+
+    if workers == 1:
+        completed = ((i, _read_results_job(*job)) for i, job in enumerate(jobs))
+        for i, (arrays, error) in completed:
+            yield _assign_results(buildings[i], filepaths[i], arrays, error)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures import as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_read_results_job, *job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                arrays, error = future.result()
+            except Exception as e:
+                arrays, error = None, '{}: {}'.format(type(e).__name__, e)
+            yield _assign_results(buildings[i], filepaths[i], arrays, error)
+
+
+def _read_results_job(filepath, zones, cache, variables):
+    try:
+        return read_results_store(filepath, zones, cache=cache, variables=variables).to_arrays(), None
+    except Exception as e:
+        return None, '{}: {}'.format(type(e).__name__, e)
+
+
+def _assign_results(building, filepath, arrays, error):
+    if arrays is not None:
+        building.results = ResultsStore.from_arrays(arrays)
+    return building, filepath, error
+
+
+def read_results_sql(building, filepath, resolution='timestep', variables=None, zones=None):
+    if zones is None:
+        zones = building.znames
+    building.results = read_results_sql_store(filepath, zones, resolution=resolution, variables=variables)
+
+
+def read_results_sql_store(filepath, zones=None, resolution='timestep', variables=None):
+    """
+    Reads an Energy+ SQLite output file into a columnar results store.
+
+    Zones and variables are matched in the report data dictionary as in the
+    ``.eso`` reader, and only their report data is queried. The aggregation
+    to hours, days or months is done by the query, so only the aggregated
+    rows leave the database. Values are summed, as in
+    ``ResultsStore.aggregate``, and warmup days are left out.
+
+    Variables can be reported at several frequencies in one file. Only the
+    finest reporting frequency that is not coarser than the resolution is
+    read, so the periods are summed from one set of timesteps. At
+    ``'timestep'`` that is the finest reporting frequency in the file.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ SQLite output file, e.g. ``eplusout.sql``
+    zones: list, optional
+        The zone names to read, all zones in the file by default
+    resolution: str
+        ``'timestep'``, ``'hourly'``, ``'daily'`` or ``'monthly'``
+    variables: list, optional
+        The variables to read, all by default
+
+    Return
+    ------
+    ResultsStore
+        The results shaped (periods, zones, variables). Daily periods start
+        at hour 0 and monthly periods on day 1
+    
+    """
+    import sqlite3
+
+    if resolution not in SQL_PERIODS:
+        raise ValueError('Unknown resolution: {}'.format(resolution))
+    if not os.path.exists(filepath):
+        raise IOError('No such file: {}'.format(filepath))
+
+    connection = sqlite3.connect(filepath)
+    try:
+        dictionary = _read_sql_dictionary(connection, zones, variables, resolution)
+        variables = _eso_variables(dictionary, variables)
+        if zones is None:
+            zones = _eso_zones(dictionary)
+        del dictionary['len_preamble']
+
+        start = '(t.Hour * 60 + t.Minute - COALESCE(t.Interval, 60))'
+        period = ', '.join(column.format(start=start) for column in SQL_PERIODS[resolution])
+        query = """
+            SELECT {period}, r.ReportDataDictionaryIndex, {value}
+            FROM ReportData r
+            JOIN Time t ON t.TimeIndex = r.TimeIndex
+            WHERE r.ReportDataDictionaryIndex IN ({keys})
+            AND (t.WarmupFlag IS NULL OR t.WarmupFlag = 0)
+            {group}
+            """.format(period=period,
+                       value='r.Value' if resolution == 'timestep' else 'SUM(r.Value)',
+                       keys=', '.join(str(int(key)) for key in dictionary),
+                       group='' if resolution == 'timestep' else 'GROUP BY 1, 2, 3, 4, 5')
+        rows = connection.execute(query).fetchall() if dictionary else []
+    finally:
+        connection.close()
+
+    zone_index = {zone: i for i, zone in enumerate(zones)}
+    variable_index = {variable: i for i, variable in enumerate(variables)}
+    keys = [int(key) for key in dictionary]
+    zone_of = np.zeros(max(keys + [0]) + 1, dtype=int)
+    variable_of = np.zeros(max(keys + [0]) + 1, dtype=int)
+    for key in dictionary:
+        zone_of[int(key)] = zone_index[dictionary[key]['zone']]
+        variable_of[int(key)] = variable_index[dictionary[key]['item']]
+
+    rows = np.array(rows, dtype=float).reshape((-1, 6))
+    times = rows[:, :4].astype(int)
+    codes = ((times[:, 0] * 100 + times[:, 1]) * 100 + times[:, 2]) * 100 + times[:, 3]
+    codes, first, row = np.unique(codes, return_index=True, return_inverse=True)
+    key = rows[:, 4].astype(int)
+    zone = zone_of[key]
+    variable = variable_of[key]
+
+    values = np.full((len(codes), len(zones), len(variables)), np.nan)
+    values[row, zone, variable] = rows[:, 5]
+    months, days, hours, minutes = times[first].T
+    return ResultsStore(values, months, days, hours, minutes, zones, variables)
+
+
+def _read_sql_dictionary(connection, zones=None, variables=None, resolution='timestep'):
+    if zones is not None:
+        zones = set(zones)
+    if variables is not None:
+        variables = set(variables)
+    query = """
+        SELECT ReportDataDictionaryIndex, KeyValue, Name, ReportingFrequency
+        FROM ReportDataDictionary
+        WHERE IsMeter = 0
+        ORDER BY ReportDataDictionaryIndex
+        """
+    entries = connection.execute(query).fetchall()
+    matches = []
+    for key, key_value, name, frequency in entries:
+        zone = _result_zone((key_value or '').lower())
+        item = _result_item((name or '').lower())
+        frequency = SQL_FREQUENCIES.get((frequency or '').lower())
+        if frequency is None or frequency > SQL_BASE_FREQUENCY[resolution]:
+            continue
+        if zone and (zones is None or zone in zones):
+            if variables is None or item in variables:
+                matches.append((key, zone, item, frequency))
 
     data = {}
-    for line in lines:
-        line = line.split(',')
-        key = line[0]
-        if key not in pre_dict and key != '2':
+    if matches:
+        base = min(match[3] for match in matches)
+        found = set()
+        for key, zone, item, frequency in matches:
+            if frequency != base or (zone, item) in found:
+                continue
+            found.add((zone, item))
+            data[str(key)] = {'zone': zone, 'item': item}
+    data['len_preamble'] = len(entries)
+    return data
+
+
+def read_results_header(filepath):
+    """
+    Reads the header of a columnar binary results file.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to a file written by ``write_results_binary``
+
+    Return
+    ------
+    dict
+        The rows, zones, variables, units and description of the file, and
+        the dtype, shape and absolute byte offset of every array by name
+    
+    """
+    return read_container_header(filepath, RESULTS_MAGIC, RESULTS_VERSION)
+
+
+def read_results_column(filepath, zone, variable, header=None):
+    """
+    Memory-maps the values of one zone and variable of a columnar binary
+    results file, without reading the other columns.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to a file written by ``write_results_binary``
+    zone: str
+        The zone name
+    variable: str
+        The variable name
+    header: dict, optional
+        The header from ``read_results_header``, read if not given
+
+    Return
+    ------
+    ndarray
+        The read-only values, one per row
+    
+    """
+    if header is None:
+        header = read_results_header(filepath)
+    return read_container_array(filepath, header, '{}/{}'.format(zone, variable))
+
+
+def read_results_binary(filepath, zones=None, variables=None):
+    """
+    Reads a columnar binary results file into a results store.
+
+    Only the columns of the requested zones and variables are read.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to a file written by ``write_results_binary``
+    zones: list, optional
+        The zones to read, all by default
+    variables: list, optional
+        The variables to read, all by default
+
+    Return
+    ------
+    ResultsStore
+        The results shaped (rows, zones, variables)
+    
+    """
+    header = read_results_header(filepath)
+    if zones is None:
+        zones = header['zones']
+    if variables is None:
+        variables = header['variables']
+    values = np.empty((header['rows'], len(zones), len(variables)))
+    for i, zone in enumerate(zones):
+        for j, variable in enumerate(variables):
+            values[:, i, j] = read_container_array(filepath, header, '{}/{}'.format(zone, variable))
+    time = [read_container_array(filepath, header, name) for name in ('months', 'days', 'hours', 'minutes')]
+    return ResultsStore(values, time[0], time[1], time[2], time[3], zones, variables)
+
+
+def results_cache_path(filepath):
+    return filepath + '.npz'
+
+
+def _eso_hash(filepath):
+    sha = hashlib.sha1()
+    with open(filepath, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def write_results_cache(filepath, store, sha1=None, all_zones=True, all_variables=True):
+    """
+    Writes a results store to a compressed ``.npz`` sidecar of a result file.
+
+    The sidecar records the size, modification time and SHA-1 hash of the
+    result file, which ``read_results_cache`` uses to detect stale sidecars,
+    and whether the store holds all zones and variables of the file.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ result file the results were read from
+    store: ResultsStore
+        The results
+    sha1: str, optional
+        The hash of the result file, computed if not given
+    all_zones: bool
+        The store holds all zones of the file, not only a selection
+    all_variables: bool
+        The store holds all variables of the file, not only a selection
+
+    Return
+    ------
+    str
+        Path to the sidecar file
+    
+    """
+    stat = os.stat(filepath)
+    if not sha1:
+        sha1 = _eso_hash(filepath)
+    path = results_cache_path(filepath)
+    temp = path + '.tmp'
+    with open(temp, 'wb') as fh:
+        np.savez_compressed(fh,
+                            version=CACHE_VERSION,
+                            size=stat.st_size,
+                            mtime=stat.st_mtime,
+                            sha1=sha1,
+                            all_zones=all_zones,
+                            all_variables=all_variables,
+                            **store.to_arrays())
+    os.replace(temp, path)
+    return path
+
+
+def read_results_cache(filepath, zones=None, variables=None):
+    """
+    Reads the ``.npz`` sidecar of a result file, if it is up to date.
+
+    A sidecar is up to date if the result file still has the size and
+    modification time it had when the sidecar was written. If only the
+    modification time changed, the content hash is compared instead and the
+    sidecar is refreshed when it matches.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ result file
+    zones: list, optional
+        The zones to return. The sidecar is not used if it misses any of
+        them, or if all zones are requested and it only holds a selection.
+    variables: list, optional
+        The variables to return. The sidecar is not used if it misses any of
+        them, or if all variables are requested and it only holds a selection.
+
+    Return
+    ------
+    ResultsStore or None
+        The cached results, or None if there is no usable sidecar
+    
+    """
+    path = results_cache_path(filepath)
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(filepath)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != CACHE_VERSION or int(data['size']) != stat.st_size:
+                return None
+            sha1 = None
+            if float(data['mtime']) != stat.st_mtime:
+                sha1 = _eso_hash(filepath)
+                if str(data['sha1']) != sha1:
+                    return None
+            store = ResultsStore.from_arrays(data)
+            all_zones = bool(data['all_zones'])
+            all_variables = bool(data['all_variables'])
+    except (IOError, OSError, KeyError, ValueError, zipfile.BadZipfile):
+        return None
+
+    if sha1:
+        write_results_cache(filepath, store, sha1=sha1, all_zones=all_zones, all_variables=all_variables)
+    if zones is None and not all_zones:
+        return None
+    if variables is None and not all_variables:
+        return None
+    if zones is not None and any(zone not in store.zone_index for zone in zones):
+        return None
+    if variables is not None and any(variable not in store.variable_index for variable in variables):
+        return None
+    return store.select(zones=zones, variables=variables)
+
+
+def results_index_path(filepath):
+    return filepath + '.idx'
+
+
+def write_results_index(filepath):
+    """
+    Writes the byte offset index of the time records of a result file.
+
+    The file is scanned once without converting any values. For every
+    ``2,`` time record the index holds its offset in the file and its month,
+    day, hour and minute, so that ``read_results_range`` can seek directly
+    to a time window. The index is stored in an ``.idx`` sidecar together
+    with the size and modification time of the result file.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ result file
+
+    Return
+    ------
+    dict
+        The index arrays
+    
+    """
+    stat = os.stat(filepath)
+    offsets = []
+    times = []
+    data_start = data_end = None
+    position = 0
+    with open(filepath, 'rb') as fh:
+        for line in fh:
+            if data_start is None:
+                position += len(line)
+                if line.strip().lower() == b'end of data dictionary':
+                    data_start = position
+                continue
+            if line.startswith(b'2,'):
+                stuff = line.split(b',')
+                offsets.append(position)
+                times.append((int(stuff[2]), int(stuff[3]), int(stuff[5]) - 1, int(float(stuff[6]))))
+            elif line.startswith(b'End of Data'):
+                data_end = position
+                break
+            position += len(line)
+    if data_start is None:
+        raise ValueError('No data dictionary found in {}'.format(filepath))
+    if data_end is None:
+        data_end = position
+
+    months, days, hours, minutes = np.array(times, dtype=int).reshape((-1, 4)).T
+    index = {'version': INDEX_VERSION,
+             'size': stat.st_size,
+             'mtime': stat.st_mtime,
+             'data_start': data_start,
+             'data_end': data_end,
+             'offsets': np.array(offsets, dtype=np.int64),
+             'months': months,
+             'days': days,
+             'hours': hours,
+             'minutes': minutes}
+    path = results_index_path(filepath)
+    temp = path + '.tmp'
+    try:
+        with open(temp, 'wb') as fh:
+            np.savez(fh, **index)
+        os.replace(temp, path)
+    except (IOError, OSError):
+        pass
+    return index
+
+
+def read_results_index(filepath):
+    """
+    Reads the ``.idx`` sidecar of a result file, writing it first if it is
+    missing or the result file changed since it was written.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ result file
+
+    Return
+    ------
+    dict
+        The index arrays, as in ``write_results_index``
+    
+    """
+    path = results_index_path(filepath)
+    if os.path.exists(path):
+        stat = os.stat(filepath)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if (int(data['version']) == INDEX_VERSION and
+                        int(data['size']) == stat.st_size and
+                        float(data['mtime']) == stat.st_mtime):
+                    return {key: data[key] for key in data.files}
+        except (IOError, OSError, KeyError, ValueError, zipfile.BadZipfile):
+            pass
+    return write_results_index(filepath)
+
+
+def read_results_range(filepath, start=None, end=None, zones=None, variables=None):
+    """
+    Reads the results of a time window of an Energy+ result file.
+
+    The time records of the window are found in the byte offset index of
+    the file, built on the first call, and only their blocks are read and
+    parsed. A query for one month of an annual file reads about a twelfth
+    of it.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ result file
+    start: datetime, optional
+        The start of the window, included. The year is ignored. From the
+        first record by default
+    end: datetime, optional
+        The end of the window, excluded. The year is ignored. To the last
+        record by default
+    zones: list, optional
+        The zone names to read, all zones in the file by default
+    variables: list, optional
+        The variables to read, all by default
+
+    Return
+    ------
+    ResultsStore
+        The results of the window shaped (timesteps, zones, variables)
+    
+    """
+    index = read_results_index(filepath)
+    with open(filepath, 'r') as fh:
+        dictionary = _read_eso_dictionary(fh, zones, variables)
+    variables = _eso_variables(dictionary, variables)
+    if zones is None:
+        zones = _eso_zones(dictionary)
+
+    offsets = index['offsets']
+    codes = ((index['months'] * 100 + index['days']) * 100 + index['hours']) * 100 + index['minutes']
+    mask = np.ones(len(codes), dtype=bool)
+    if start is not None:
+        mask &= codes >= ((start.month * 100 + start.day) * 100 + start.hour) * 100 + start.minute
+    if end is not None:
+        mask &= codes < ((end.month * 100 + end.day) * 100 + end.hour) * 100 + end.minute
+    selected = np.flatnonzero(mask)
+
+    ends = np.r_[offsets[1:], int(index['data_end'])]
+    runs = np.split(selected, np.flatnonzero(np.diff(selected) != 1) + 1) if len(selected) else []
+
+    def records():
+        with open(filepath, 'rb') as fh:
+            for run in runs:
+                first = int(offsets[run[0]])
+                fh.seek(first)
+                block = fh.read(int(ends[run[-1]]) - first).decode('latin-1')
+                for record in _iter_eso_data(block.splitlines(), dictionary):
+                    yield record
+
+    return ResultsStore.from_records(records(), zones, variables)
+
+
+def _eso_zones(dictionary):
+    found = []
+    for key in dictionary:
+        if key == 'len_preamble':
+            continue
+        zone = dictionary[key]['zone']
+        if zone not in found:
+            found.append(zone)
+    return found
+
+
+def _eso_variables(dictionary, variables=None):
+    found = []
+    for key in dictionary:
+        if key == 'len_preamble':
             continue
-        elif key == '2':
-            month = int(line[2])
-            day = int(line[3])
-            hour = int(line[5]) - 1
-            minutes = int(float(line[6]))
-            time_key = '{}_{}_{}_{}'.format(minutes, hour, day, month)
-            if time_key not in data:
-                data[time_key] =  {zk:{} for zk in zones}
-        else:
-            zone = pre_dict[key]['zone']
-            item = pre_dict[key]['item']
-            value = float(line[1].strip())
-            data[time_key][zone][item] = value
+        item = dictionary[key]['item']
+        if item not in found:
+            found.append(item)
+    if variables is None:
+        return found
+    return [variable for variable in variables if variable in found]
+
+
+def _results_dict(records, zones):
+    data = {}
+    for time, values in records:
+        time_key = '{}_{}_{}_{}'.format(*time)
+        if time_key not in data:
+            data[time_key] = {zk: {} for zk in zones}
+        for zone in values:
+            data[time_key][zone].update(values[zone])
     return data
 
 
-def read_eso_preamble(building, filepath):
-    fh = open(filepath, 'r')
-    lines = fh.readlines()
-    fh.close()
+def iter_eso_records(filepath, zones, variables=None):
+    """
+    Reads an Energy+ result file in a single pass, one timestep at a time.
+
+    The data dictionary is parsed first, then every time record and the
+    zone values that follow it are yielded before the next time record is
+    read, so memory use does not grow with the length of the file.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the energy+ result file
+    zones: list
+        The zone names to read, as in ``Building.znames``
+    variables: list, optional
+        The variables to read, all by default
+
+    Yields
+    ------
+    tuple
+        The time of the record as (minutes, hour, day, month)
+    dict
+        The values of the record per zone and item
+    
+    """
+    with open(filepath, 'r') as fh:
+        dictionary = _read_eso_dictionary(fh, zones, variables)
+        for record in _iter_eso_data(fh, dictionary):
+            yield record
 
-    del lines[:7]
-    del lines[-2:]
 
-    zones = building.znames
+def _read_eso_dictionary(fh, zones, variables=None):
+    if zones is not None:
+        zones = set(zones)
+    if variables is not None:
+        variables = set(variables)
+    for _ in range(7):
+        next(fh)
 
     data = {}
     len_preamble = 0
-    for line in lines:
+    for line in fh:
         line = line.lower()
         line = line.strip()
         if line == 'end of data dictionary':
             break
-        # print(line)
         len_preamble += 1
         stuff = line.split(',')
         key = stuff[0]
-        zone = stuff[2].split(' ')[0]
-        # print(zone)
-        stuff_ = zone.split('_')[:-1]
-        zone = ''
-        for i, s in enumerate(stuff_):
-            zone += s
-            if i < len(stuff_) - 1:
-                zone += '_'
-        # print(zone)
-        
-        item = stuff[3]
-        if zone in zones:
-            if 'cooling' in item:
-                item = 'cooling'
-            elif 'heating' in item:
-                item = 'heating'
-            elif 'lights' in item:
-                item = 'lighting'
-            elif 'temperature' in item:
-                item = 'mean_air_temperature'
-            
-            data[key] = {'zone': zone, 'item': item}
+        zone = _result_zone(stuff[2])
+        item = _result_item(stuff[3])
+        if zone and (zones is None or zone in zones):
+            if variables is None or item in variables:
+                data[key] = {'zone': zone, 'item': item}
     data['len_preamble'] = len_preamble
     return data
 
 
+def _result_zone(key):
+    return '_'.join(key.split(' ')[0].split('_')[:-1])
+
+
+def _result_item(item):
+    if 'cooling' in item:
+        return 'cooling'
+    elif 'heating' in item:
+        return 'heating'
+    elif 'lights' in item:
+        return 'lighting'
+    elif 'temperature' in item:
+        return 'mean_air_temperature'
+    return item
+
+
+def _iter_eso_data(fh, dictionary):
+    time = None
+    values = None
+    for line in fh:
+        key, _, rest = line.partition(',')
+        if key == '2':
+            if values is not None:
+                yield time, values
+            stuff = rest.split(',')
+            month = int(stuff[1])
+            day = int(stuff[2])
+            hour = int(stuff[4]) - 1
+            minutes = int(float(stuff[5]))
+            time = (minutes, hour, day, month)
+            values = {}
+        elif key in dictionary:
+            if values is None:
+                continue
+            zone = dictionary[key]['zone']
+            item = dictionary[key]['item']
+            if zone not in values:
+                values[zone] = {}
+            values[zone][item] = float(rest.split(',', 1)[0])
+        elif key.startswith('End of Data'):
+            break
+    if values is not None:
+        yield time, values
+
+
+def read_eso(building, filepath, pre_dict):
+    with open(filepath, 'r') as fh:
+        for line in fh:
+            if line.strip().lower() == 'end of data dictionary':
+                break
+        return _results_dict(_iter_eso_data(fh, pre_dict), building.znames)
+
+
+def read_eso_preamble(building, filepath):
+    with open(filepath, 'r') as fh:
+        return _read_eso_dictionary(fh, building.znames)
+
+
 def read_mean_zone_temperatures(building, filepath):
     """
     Reads mean zone air temperatures from an Energy+ result file. 
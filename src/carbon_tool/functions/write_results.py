@@ -0,0 +1,169 @@
+from __future__ import print_function
+
+__author__ = ["Tomas Mendez Echenagucia"]
+__copyright__ = "Tomas Mendez Echenagucia - University of Washington"
+__license__ = "MIT License"
+__email__ = "tmendeze@uw.edu"
+__version__ = "0.1.0"
+
+try:
+    import numpy as np
+except:
+    np = None
+
+from carbon_tool.functions.container import write_container
+
+
+__all__ = ['write_operational_csv',
+           'write_results_binary',
+          ]
+
+
+RESULTS_MAGIC = b'CTRESLT\x00'
+RESULTS_VERSION = 1
+
+
+def write_operational_csv(filepath, times, zones, heat, cool, light, compress=False, batch=1000):
+    """
+    Writes heating, cooling and lighting per zone and their totals to a csv file.
+
+    The values are interleaved into one block of rows, which is formatted
+    and written ``batch`` rows at a time. Values are formatted with ``str``,
+    as the older value by value writers did, so only the formatting matches
+    theirs: values summed in a different order can differ in the last digit.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the csv file
+    times: list
+        The ``datetime`` of each row
+    zones: list
+        The zone names
+    heat, cool, light: ndarray
+        The values, each shaped (rows, zones), or lists of rows without NumPy
+    compress: bool
+        Write a gzip compressed file, with ``.gz`` appended to the path
+    batch: int
+        Number of rows formatted and written at once
+
+    Return
+    ------
+    str
+        Path to the written file
+
+    """
+    nz = len(zones)
+    if np is None:
+        block = [_operational_row(heat[i], cool[i], light[i]) for i in range(len(times))]
+    else:
+        tot_heat = 0
+        tot_cool = 0
+        tot_light = 0
+        for j in range(nz):
+            tot_heat = tot_heat + heat[:, j]
+            tot_cool = tot_cool + cool[:, j]
+            tot_light = tot_light + light[:, j]
+
+        block = np.zeros((len(times), 3 * nz + 3))
+        block[:, 0:3 * nz:3] = heat
+        block[:, 1:3 * nz:3] = cool
+        block[:, 2:3 * nz:3] = light
+        block[:, -3] = tot_heat
+        block[:, -2] = tot_cool
+        block[:, -1] = tot_light
+
+    if compress:
+        import gzip
+        filepath = filepath + '.gz'
+        fh = gzip.open(filepath, 'wt')
+    else:
+        fh = open(filepath, 'w')
+
+    with fh:
+        header = ['time,']
+        for zone in zones:
+            header.append('{0} heating (KWh),{0} cooling (KWh),{0} lighting (KWh),'.format(zone))
+        header.append('TOTAL heating (KWh),TOTAL cooling (KWh),TOTAL lighting (KWh)\n')
+        fh.write(''.join(header))
+
+        for start in range(0, len(times), batch):
+            rows = block[start:start + batch]
+            rows = zip(times[start:start + batch], rows if np is None else rows.tolist())
+            lines = ['{},{}\n'.format(time, ','.join(map(str, row))) for time, row in rows]
+            fh.write(''.join(lines))
+    return filepath
+
+
+def _operational_row(heat, cool, light):
+    row = []
+    tot_heat = 0
+    tot_cool = 0
+    tot_light = 0
+    for h, c, l in zip(heat, cool, light):
+        row.extend((h, c, l))
+        tot_heat += h
+        tot_cool += c
+        tot_light += l
+    row.extend((tot_heat, tot_cool, tot_light))
+    return row
+
+
+def write_results_binary(filepath, times, zones, columns, units=None, dtype='float64', description=''):
+    """
+    Writes results to a self-describing columnar binary file.
+
+    The file is a container as written by ``write_container``, whose JSON
+    header names the zones, variables and units. The month, day, hour and
+    minute of each row are stored as int16 arrays, followed by one
+    contiguous array per zone and variable, each of which can be
+    memory-mapped on its own with ``read_results_column``.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the binary file
+    times: list
+        The ``datetime`` of each row
+    zones: list
+        The zone names
+    columns: dict
+        The values shaped (rows, zones) per variable name
+    units: dict, optional
+        The units per variable name
+    dtype: str
+        ``'float64'`` or ``'float32'``
+    description: str
+        A note stored in the header
+
+    Return
+    ------
+    str
+        Path to the written file
+
+    """
+    dtype = np.dtype(dtype).newbyteorder('<')
+    if dtype.kind != 'f':
+        raise ValueError('Results are written as float32 or float64, not {}'.format(dtype))
+    units = units or {}
+    variables = list(columns)
+    rows = len(times)
+
+    arrays = [('months', np.array([t.month for t in times], dtype='<i2')),
+              ('days', np.array([t.day for t in times], dtype='<i2')),
+              ('hours', np.array([t.hour for t in times], dtype='<i2')),
+              ('minutes', np.array([t.minute for t in times], dtype='<i2'))]
+    for j, zone in enumerate(zones):
+        for variable in variables:
+            arrays.append(('{}/{}'.format(zone, variable), np.asarray(columns[variable][:, j], dtype=dtype)))
+
+    header = {'rows': rows,
+              'zones': list(zones),
+              'variables': variables,
+              'units': {variable: units.get(variable, '') for variable in variables},
+              'description': description}
+    return write_container(filepath, RESULTS_MAGIC, RESULTS_VERSION, header, arrays)
+
+
+if __name__ == '__main__':
+    pass
@@ -7,6 +7,16 @@ from compas_invocations import docs
 from compas_invocations import style
 from compas_invocations import tests
 from invoke import Collection
+from invoke import task
+
+
+@task()
+def compile_materials(ctx):
+    """Compiles the materials csv files and conversion table into a binary database."""
+    from carbon_tool.functions import compile_materials
+
+    print("Compiled materials database: {}".format(compile_materials()))
+
 
 ns = Collection(
     docs.help,
@@ -21,6 +31,7 @@ ns = Collection(
     build.prepare_changelog,
     build.clean,
     build.release,
+    compile_materials,
 )
 ns.configure(
     {
@@ -0,0 +1,132 @@
+import random
+import sqlite3
+
+import pytest
+
+
+ZONES = ['zone_0', 'zone_1']
+
+ITEMS = [('ZONE_{}_IDEALLOADS', 'Zone Ideal Loads Supply Air Total Cooling Energy', 'J'),
+         ('ZONE_{}_IDEALLOADS', 'Zone Ideal Loads Supply Air Total Heating Energy', 'J'),
+         ('ZONE_{}_LIGHTS', 'Zone Lights Electric Energy', 'J')]
+
+HOURS = 72
+
+
+@pytest.fixture
+def results_files(tmpdir):
+    """An hourly eplusout.eso and the matching eplusout.sql of two zones over three days."""
+    random.seed(0)
+    entries = []
+    for z in range(len(ZONES)):
+        for key, name, units in ITEMS:
+            entries.append((key.format(z).upper(), name, units))
+    hours = [(h // 24 + 1, h % 24 + 1) for h in range(HOURS)]
+    values = [[random.choice([0., random.uniform(0, 1e6)]) for _ in entries] for _ in hours]
+
+    eso = ['Program Version,EnergyPlus, Version 9.6.0-f420c06a69, YMD=2023.03.28 16:32',
+           '1,5,Environment Title[],Latitude[deg],Longitude[deg],Time Zone[],Elevation[m]',
+           '2,8,Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],Hour[],StartMinute[],'
+           'EndMinute[],DayType',
+           '3,5,Cumulative Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],DayType',
+           '4,2,Cumulative Days of Simulation[],Month[]',
+           '5,1,Cumulative Days of Simulation[]',
+           '6,1,Calendar Year of Simulation[]']
+    for i, (key, name, units) in enumerate(entries):
+        eso.append('{},1,{},{} [{}] !Hourly'.format(i + 7, key, name, units))
+    eso.append('End of Data Dictionary')
+    eso.append('1,RUN PERIOD 1,  47.45, -122.30,  -8.00, 132.00')
+    for (day, hour), row in zip(hours, values):
+        eso.append('2,{0},1,{0}, 0,{1}, 0.00,60.00,Sunday'.format(day, hour))
+        for i, value in enumerate(row):
+            eso.append('{},{!r}'.format(i + 7, value))
+    eso.append('End of Data')
+    eso_path = str(tmpdir.join('eplusout.eso'))
+    with open(eso_path, 'w') as fh:
+        fh.write('\n'.join(eso) + '\n')
+
+    sql_path = str(tmpdir.join('eplusout.sql'))
+    connection = sqlite3.connect(sql_path)
+    connection.execute('CREATE TABLE ReportDataDictionary (ReportDataDictionaryIndex INTEGER PRIMARY KEY, '
+                       'IsMeter INTEGER, Type TEXT, IndexGroup TEXT, TimestepType TEXT, KeyValue TEXT, Name TEXT, '
+                       'ReportingFrequency TEXT, ScheduleName TEXT, Units TEXT)')
+    connection.execute('CREATE TABLE ReportData (ReportDataIndex INTEGER PRIMARY KEY, TimeIndex INTEGER, '
+                       'ReportDataDictionaryIndex INTEGER, Value REAL)')
+    connection.execute('CREATE TABLE Time (TimeIndex INTEGER PRIMARY KEY, Year INTEGER, Month INTEGER, '
+                       'Day INTEGER, Hour INTEGER, Minute INTEGER, Dst INTEGER, Interval INTEGER, '
+                       'IntervalType INTEGER, SimulationDays INTEGER, DayType TEXT, '
+                       'EnvironmentPeriodIndex INTEGER, WarmupFlag INTEGER)')
+
+    # the same variables reported daily, listed first, must not be read
+    daily = len(entries)
+    for i, (key, name, units) in enumerate(entries):
+        connection.execute('INSERT INTO ReportDataDictionary VALUES (?, 0, "Sum", "Zone", "Zone", ?, ?, "Daily", '
+                           '"", ?)', (i + 1, key, name, units))
+        connection.execute('INSERT INTO ReportDataDictionary VALUES (?, 0, "Sum", "Zone", "Zone", ?, ?, "Hourly", '
+                           '"", ?)', (daily + i + 1, key, name, units))
+
+    # a warmup hour, left out of the results
+    connection.execute('INSERT INTO Time VALUES (0, 2023, 1, 1, 1, 0, 0, 60, 1, 1, "Sunday", 1, 1)')
+    connection.execute('INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, Value) VALUES (0, ?, 1e12)',
+                       (daily + 1,))
+    for t, ((day, hour), row) in enumerate(zip(hours, values)):
+        connection.execute('INSERT INTO Time VALUES (?, 2023, 1, ?, ?, 0, 0, 60, 1, ?, "Sunday", 1, 0)',
+                           (t + 1, day, hour, day))
+        for i, value in enumerate(row):
+            connection.execute('INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, Value) '
+                               'VALUES (?, ?, ?)', (t + 1, daily + i + 1, value))
+    for day in range(1, HOURS // 24 + 1):
+        connection.execute('INSERT INTO Time VALUES (?, 2023, 1, ?, 24, 0, 0, 1440, 2, ?, "Sunday", 1, 0)',
+                           (HOURS + day, day, day))
+        for i in range(len(entries)):
+            connection.execute('INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, Value) '
+                               'VALUES (?, ?, -1.)', (HOURS + day, i + 1))
+    connection.commit()
+    connection.close()
+    return eso_path, sql_path
+
+
+def box(x0, y0, z0, x1, y1, z1):
+    return [[[x0, y0, z0], [x0, y1, z0], [x1, y1, z0], [x1, y0, z0]],
+            [[x0, y0, z1], [x1, y0, z1], [x1, y1, z1], [x0, y1, z1]],
+            [[x0, y0, z0], [x1, y0, z0], [x1, y0, z1], [x0, y0, z1]],
+            [[x1, y0, z0], [x1, y1, z0], [x1, y1, z1], [x1, y0, z1]],
+            [[x1, y1, z0], [x0, y1, z0], [x0, y1, z1], [x1, y1, z1]],
+            [[x0, y1, z0], [x0, y0, z0], [x0, y0, z1], [x0, y1, z1]]]
+
+
+def make_building(name, out_path, span=20.):
+    from carbon_tool.datastructures import Building
+
+    zones = [box(0, 0, 0, 30, 40, 12), box(30, 0, 0, 60, 40, 12)]
+    xs = [i * span for i in range(int(60 / span) + 1)]
+    ys = [i * span for i in range(int(40 / span) + 1)]
+    columns = [[[x, y, 0], [x, y, 12]] for x in xs for y in ys]
+    beams_x = [[[x, y, 12], [x + span, y, 12]] for x in xs[:-1] for y in ys]
+    beams_y = [[[x, y, 12], [x, y + span, 12]] for x in xs for y in ys[:-1]]
+    cores = [[[28, 18, 0], [32, 18, 0], [32, 22, 0], [28, 22, 0], [28, 18, 0]]]
+    orientations = ['north', 'east', 'south', 'west']
+    shades = {o: {'horizontal': {'depth': 1, 'num': 0}, 'vertical': {'depth': 1, 'num': 0}} for o in orientations}
+    return Building.from_polygons(name, zones, None, False, False, {o: .4 for o in orientations}, shades,
+                                  {o: False for o in orientations}, 'double', {}, 'Brick', 'EPS', 4, 'None',
+                                  '2x6 Wood Studs', 'Gyp', 'Seattle', str(out_path), False, 'Type 4A', 1, False,
+                                  columns, beams_x, beams_y, cores,
+                                  balconies=[[[0, -5, 12], [60, -5, 12], [60, 0, 12], [0, 0, 12]]])
+
+
+@pytest.fixture
+def building(results_files, tmpdir):
+    """A two-zone building made from polygons, with embodied carbon and the results of ``results_files``."""
+    from carbon_tool.functions import read_results_file
+
+    building = make_building('test_building', tmpdir)
+    building.compute_structure_embodied()
+    building.compute_envelope_embodied()
+    read_results_file(building, results_files[0])
+    return building
+
+
+@pytest.fixture
+def building_factory(tmpdir):
+    """Makes more buildings with the geometry of ``building``, without embodied carbon or results."""
+    return lambda name: make_building(name, tmpdir)
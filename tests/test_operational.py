@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from carbon_tool.datastructures import Building
+from carbon_tool.datastructures import building as building_module
+from carbon_tool.functions import read_results as read_results_module
+from carbon_tool.functions import write_results as write_results_module
+from carbon_tool.functions import read_results_file
+
+
+ZONES = ['zone_0', 'zone_1']
+
+
+def make_building(eso_path, out_path, name):
+    building = Building()
+    building.name = name
+    building.znames = list(ZONES)
+    building.out_path = str(out_path)
+    os.makedirs(os.path.join(building.out_path, name))
+    read_results_file(building, eso_path)
+    return building
+
+
+def test_operational_without_numpy(results_files, tmpdir, monkeypatch):
+    eso_path, _ = results_files
+    with_numpy = make_building(eso_path, tmpdir, 'numpy')
+    for module in (building_module, read_results_module, write_results_module):
+        monkeypatch.setattr(module, 'np', None)
+    without_numpy = make_building(eso_path, tmpdir, 'python')
+
+    assert isinstance(without_numpy.results, dict)
+    assert np.allclose(without_numpy.report_operational(), with_numpy.report_operational())
+    for building in (with_numpy, without_numpy):
+        building.write_hourly_operational()
+        building.write_daily_operational()
+
+    def read(building, filename):
+        with open(os.path.join(building.out_path, building.name, filename)) as fh:
+            return fh.read().splitlines()
+
+    assert read(without_numpy, 'operational_hourly_results.csv') == read(with_numpy, 'operational_hourly_results.csv')
+    daily = read(without_numpy, 'operational_daily_results.csv')
+    expected = read(with_numpy, 'operational_daily_results.csv')
+    assert daily[0] == expected[0]
+    assert len(daily) == len(expected) == 4
+    for line, expected_line in zip(daily[1:], expected[1:]):
+        time, values = line.split(',', 1)
+        expected_time, expected_values = expected_line.split(',', 1)
+        assert time == expected_time
+        assert np.allclose([float(v) for v in values.split(',')], [float(v) for v in expected_values.split(',')])
@@ -0,0 +1,27 @@
+def test_quantities_follow_in_place_edits(building_factory):
+    building = building_factory('quantities')
+    floor_area = building.floor_area
+    ratio = building.surface_to_volume()
+    assert building.quantities['windows']['north']['zone_0'] == 360 * .4
+
+    # window to wall ratios and face counts are part of the cache key
+    building.wwrs['north'] = .2
+    assert building.quantities['windows']['north']['zone_0'] == 360 * .2
+
+    wall = [[0, 0, 12], [30, 0, 12], [30, 0, 15], [0, 0, 15]]
+    building.zone_faces['zone_0']['south'].append(wall)
+    building.zone_faces['zone_0']['walls'].append(wall)
+    assert building.quantities['walls']['south']['zone_0'] == 360 + 90
+    assert building.surface_to_volume() == ratio + 90 / building.volume
+
+    # moving the points of a face needs invalidate_quantities
+    for point in building.zone_faces['zone_0']['floor']:
+        point[0] *= 2
+    assert building.floor_area == floor_area
+    building.invalidate_quantities()
+    assert building.floor_area == floor_area + 1200
+    for point in building.zone_faces['zone_1']['east'][0]:
+        point[2] *= 2
+    building.invalidate_quantities()
+    assert building.quantities['walls']['east']['zone_1'] == 2 * 480
+    assert building.surface_to_volume() == ratio + (90 + 480) / building.volume
@@ -0,0 +1,24 @@
+import numpy as np
+
+from carbon_tool.functions import read_results_sql_store
+from carbon_tool.functions import read_results_store
+
+
+ZONES = ['zone_0', 'zone_1']
+
+
+def test_read_results_sql_store_matches_eso(results_files):
+    eso_path, sql_path = results_files
+    eso = read_results_store(eso_path, ZONES)
+    sql = read_results_sql_store(sql_path, ZONES)
+
+    assert sql.zones == eso.zones
+    assert sorted(sql.variables) == sorted(eso.variables)
+    assert sql.keys() == eso.keys()
+    sql = sql.select(variables=eso.variables)
+    assert np.allclose(sql.values, eso.values)
+
+    for resolution in ['hourly', 'daily', 'monthly']:
+        store = read_results_sql_store(sql_path, ZONES, resolution=resolution, variables=eso.variables)
+        assert store.datetimes(resolution) == eso.datetimes(resolution)
+        assert np.allclose(store.values, eso.aggregate(resolution))
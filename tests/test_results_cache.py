@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+
+from carbon_tool.functions import read_results_store
+from carbon_tool.functions.read_results import results_cache_path
+
+
+ZONES = ['zone_0', 'zone_1']
+
+
+def test_filtered_then_unfiltered_read(results_files):
+    eso_path, _ = results_files
+    expected = read_results_store(eso_path, ZONES)
+
+    filtered = read_results_store(eso_path, ZONES, cache=True, variables=['cooling'])
+    assert filtered.variables == ['cooling']
+    assert os.path.exists(results_cache_path(eso_path))
+
+    store = read_results_store(eso_path, ZONES, cache=True)
+    assert store.variables == expected.variables
+    assert np.array_equal(store.values, expected.values)
+
+    # the complete sidecar now serves filtered reads
+    store = read_results_store(eso_path, ZONES, cache=True, variables=['lighting'])
+    assert store.variables == ['lighting']
+    assert np.array_equal(store.variable('lighting'), expected.variable('lighting'))
+
+
+def edit_first_value(eso_path):
+    # changes the last digit of the first data value, keeping the file size
+    with open(eso_path) as fh:
+        lines = fh.read().split('\n')
+    i = lines.index('End of Data Dictionary') + 3
+    key, value = lines[i].split(',')
+    digit = '1' if value[-1] != '1' else '2'
+    lines[i] = '{},{}'.format(key, value[:-1] + digit)
+    with open(eso_path, 'w') as fh:
+        fh.write('\n'.join(lines))
+    return int(key) - 7, float(value[:-1] + digit)
+
+
+def sidecar(eso_path):
+    with np.load(results_cache_path(eso_path), allow_pickle=False) as data:
+        return float(data['mtime']), data['values'].copy()
+
+
+def test_stale_sidecar_is_rebuilt(results_files):
+    eso_path, _ = results_files
+    read_results_store(eso_path, ZONES, cache=True)
+    stat = os.stat(eso_path)
+
+    column, value = edit_first_value(eso_path)
+    assert os.stat(eso_path).st_size == stat.st_size
+    os.utime(eso_path, (stat.st_atime, stat.st_mtime + 10))
+
+    store = read_results_store(eso_path, ZONES, cache=True)
+    expected = read_results_store(eso_path, ZONES)
+    assert np.array_equal(store.values, expected.values)
+    assert expected.values[0].ravel()[column] == value
+    mtime, values = sidecar(eso_path)
+    assert mtime == os.stat(eso_path).st_mtime
+    assert np.array_equal(values, expected.values)
+
+
+def test_touched_file_reuses_sidecar(results_files):
+    eso_path, _ = results_files
+    expected = read_results_store(eso_path, ZONES, cache=True)
+    stat = os.stat(eso_path)
+    os.utime(eso_path, (stat.st_atime, stat.st_mtime + 10))
+
+    store = read_results_store(eso_path, ZONES, cache=True)
+    assert np.array_equal(store.values, expected.values)
+    # the content hash matched, so the sidecar was refreshed with the new mtime
+    mtime, _ = sidecar(eso_path)
+    assert mtime == stat.st_mtime + 10
+
+
+def test_corrupt_sidecar_is_rebuilt(results_files):
+    eso_path, _ = results_files
+    expected = read_results_store(eso_path, ZONES, cache=True)
+    with open(results_cache_path(eso_path), 'wb') as fh:
+        fh.write(b'not a zip file')
+
+    store = read_results_store(eso_path, ZONES, cache=True)
+    assert np.array_equal(store.values, expected.values)
+    _, values = sidecar(eso_path)
+    assert np.array_equal(values, expected.values)
+
+
+def test_unfiltered_then_filtered_read(results_files):
+    eso_path, _ = results_files
+    expected = read_results_store(eso_path, ZONES, cache=True)
+
+    store = read_results_store(eso_path, ['zone_1'], cache=True, variables=['heating', 'cooling'])
+    assert store.zones == ['zone_1']
+    assert store.variables == ['heating', 'cooling']
+    assert np.array_equal(store.variable('heating'), expected.variable('heating', ['zone_1']))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from carbon_tool.datastructures import Building
+from carbon_tool.datastructures import encode_header
+from carbon_tool.datastructures import encode_sections
+from carbon_tool.datastructures.serialization import BUILDING_MAGIC
+from carbon_tool.datastructures.serialization import FACE_SECTIONS
+from carbon_tool.datastructures.serialization import OBJECT_SECTIONS
+from carbon_tool.functions.container import write_container
+
+
+def embodied(building):
+    structure = building.structure
+    envelope = building.envelope
+    return [structure.slab_embodied, structure.beam_embodied, structure.column_embodied,
+            structure.connections_embodied, structure.core_embodied,
+            envelope.window_embodied, envelope.shading_embodied, envelope.wall_embodied]
+
+
+def assert_same_building(loaded, building):
+    assert loaded.name == building.name
+    assert loaded.znames == building.znames
+    assert loaded.floor_area == building.floor_area
+    assert loaded.zone_faces == building.zone_faces
+    assert loaded.balcony_faces == building.balcony_faces
+    assert len(loaded.columns) == len(building.columns)
+    assert loaded.columns == building.columns
+    assert loaded.structure.n_columns == building.structure.n_columns
+    assert loaded.structure.main_beams == building.structure.main_beams
+    assert embodied(loaded) == embodied(building)
+
+    store = loaded.results_store
+    expected = building.results_store
+    assert store.zones == expected.zones
+    assert store.variables == expected.variables
+    assert store.keys() == expected.keys()
+    assert np.array_equal(store.values, expected.values, equal_nan=True)
+    assert loaded.report_operational() == building.report_operational()
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_building_file_round_trip(building, tmpdir, lazy):
+    filepath = building.to_file(output=False, path=str(tmpdir))
+    loaded = Building.from_file(filepath, output=False, lazy=lazy)
+    if lazy:
+        assert 'results' not in loaded.__dict__
+        assert 'zone_faces' not in loaded.__dict__
+    assert_same_building(loaded, building)
+
+    # embodied carbon is computed again from the loaded geometry
+    loaded.compute_structure_embodied()
+    loaded.compute_envelope_embodied()
+    assert embodied(loaded) == embodied(building)
+
+
+def test_lazy_building_is_read_whole_when_saved_again(building, tmpdir):
+    filepath = building.to_file(output=False, path=str(tmpdir))
+    loaded = Building.from_file(filepath, output=False, lazy=True)
+    filepath = loaded.to_file(output=False, path=str(tmpdir), name='again')
+    assert_same_building(Building.from_file(filepath, output=False), building)
+
+
+def test_version_1_building_file(building, tmpdir):
+    # version 1 files keep the member lists and reports in the JSON header
+    header = encode_header(building)
+    header['faces'] = {}
+    arrays = []
+    for section, (block, block_arrays) in encode_sections(building).items():
+        if section in OBJECT_SECTIONS:
+            for owner, names in OBJECT_SECTIONS[section].items():
+                obj = building if owner == 'building' else getattr(building, owner)
+                header[owner].update((name, obj.__dict__[name]) for name in names)
+            continue
+        if section in FACE_SECTIONS:
+            header['faces'].update(block['faces'])
+        else:
+            header.update(block)
+        arrays.extend(block_arrays)
+    filepath = write_container(str(tmpdir.join('old.ctb')), BUILDING_MAGIC, 1, header, arrays)
+
+    for lazy in (False, True):
+        assert_same_building(Building.from_file(filepath, output=False, lazy=lazy), building)
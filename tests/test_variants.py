@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+
+from carbon_tool.datastructures import VariantStore
+
+
+def embodied(building):
+    structure = building.structure
+    envelope = building.envelope
+    return [structure.slab_embodied, structure.beam_embodied, structure.column_embodied,
+            structure.connections_embodied, structure.core_embodied,
+            envelope.window_embodied, envelope.shading_embodied, envelope.wall_embodied]
+
+
+def test_variants_share_blocks(building, building_factory, tmpdir):
+    # the same geometry and structure with thicker exterior insulation
+    variant = building_factory('variant')
+    variant.envelope.insulation_thickness = 8
+    variant.compute_structure_embodied()
+    variant.compute_envelope_embodied()
+    assert variant.envelope.wall_embodied != building.envelope.wall_embodied
+
+    store = VariantStore(str(tmpdir.join('project')))
+    first = store.save(building)
+    second = store.save(variant)
+
+    for section in ('zone_faces', 'balcony_faces', 'context_building_faces', 'members'):
+        assert first[section] == second[section]
+    assert first['reports'] != second['reports']
+    assert first['results'] != second['results']
+
+    hashes = set(first.values()) | set(second.values())
+    assert sorted(store.blocks()) == sorted(hashes)
+    files = [name for _, _, names in os.walk(os.path.join(store.path, 'blocks')) for name in names]
+    assert len(files) == len(hashes)
+    assert store.variants() == ['test_building', 'variant']
+
+    for original in (building, variant):
+        for lazy in (False, True):
+            loaded = store.load(original.name, lazy=lazy)
+            assert loaded.zone_faces == original.zone_faces
+            assert loaded.columns == original.columns
+            assert loaded.structure.main_beams == original.structure.main_beams
+            assert loaded.envelope.insulation_thickness == original.envelope.insulation_thickness
+            assert loaded.envelope.env_strings == original.envelope.env_strings
+            assert loaded.floor_area == original.floor_area
+            assert embodied(loaded) == embodied(original)
+            if original.results is None:
+                assert loaded.results is None
+            else:
+                assert np.array_equal(loaded.results.values, original.results.values)
+
+    store.remove('variant')
+    assert sorted(store.blocks()) == sorted(first.values())
+    assert store.load('test_building').floor_area == building.floor_area